@@ -0,0 +1,245 @@
+"""Gerador de carga para o servidor do Desafio 1.
+
+Dois modos:
+    closed  N workers, cada um envia a próxima requisição assim que recebe a resposta
+    open    taxa fixa de requisições por segundo, independente das respostas; a
+            latência é medida a partir do horário planejado de envio, então atrasos
+            do servidor não ficam escondidos (coordinated omission)
+
+Cada worker usa uma conexão HTTP keep-alive. As latências vão para histogramas
+log-lineares (estilo HDR) por endpoint, com resumos periódicos e um resumo final.
+
+Exemplos:
+    python loadgen.py --mode closed --workers 16 --duration 30
+    python loadgen.py --mode open --rate 500 --duration 30
+"""
+import argparse
+import http.client
+import math
+import queue
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+class Histogram:
+    """Histograma de latências com erro relativo limitado, como o HdrHistogram.
+
+    Os valores (em microssegundos) são agrupados por potência de dois e cada faixa é
+    dividida em SUB_BUCKETS partes iguais, com erro abaixo de 1% em qualquer escala.
+    """
+
+    SUB_BUCKETS = 128
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value):
+        # Abaixo de 2 * SUB_BUCKETS us o valor é exato; acima, guarda os 8 bits mais altos
+        if value < 2 * self.SUB_BUCKETS:
+            return 0, value
+        exponent = value.bit_length() - 8
+        return exponent, value >> exponent
+
+    def record(self, seconds):
+        value = int(seconds * 1_000_000)
+        key = self._index(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct):
+        """Retorna o percentil em milissegundos."""
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * pct / 100))
+        seen = 0
+        for exponent, sub in sorted(self.counts):
+            seen += self.counts[(exponent, sub)]
+            if seen >= target:
+                # Limite superior do bucket, nunca acima do máximo observado
+                return min((sub + 1) << exponent, self.max) / 1000
+        return self.max / 1000
+
+class EndpointStats:
+    def __init__(self):
+        self.histogram = Histogram()
+        self.errors = 0
+        self.statuses = {}
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+class Recorder:
+    """Acumula estatísticas por endpoint, com uma janela para os resumos periódicos."""
+
+    def __init__(self, endpoints):
+        self.endpoints = endpoints
+        self.lock = threading.Lock()
+        self.window = {path: EndpointStats() for path in endpoints}
+        self.total = {path: EndpointStats() for path in endpoints}
+
+    def record(self, path, status, seconds):
+        with self.lock:
+            stats = self.window[path]
+            stats.histogram.record(seconds)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if status is None or status >= 400:
+                stats.errors += 1
+
+    def rotate(self):
+        with self.lock:
+            window = self.window
+            self.window = {path: EndpointStats() for path in self.endpoints}
+        for path, stats in window.items():
+            self.total[path].merge(stats)
+        return window
+
+class Client:
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.conn = None
+        self.connections = 0
+
+    def get(self, path):
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self.connections += 1
+        try:
+            self.conn.request('GET', path)
+            response = self.conn.getresponse()
+            response.read()
+            if response.will_close:
+                self.close()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self.close()
+            return None
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+def pick_endpoint(rng, endpoints, weights):
+    return rng.choices(endpoints, weights)[0]
+
+def closed_loop_worker(client, args, recorder, stop, seed):
+    rng = random.Random(seed)
+    while not stop.is_set():
+        path = pick_endpoint(rng, args.endpoints, args.weights)
+        start = time.perf_counter()
+        status = client.get(path)
+        recorder.record(path, status, time.perf_counter() - start)
+
+def open_loop_worker(client, recorder, schedule):
+    while True:
+        item = schedule.get()
+        if item is None:
+            return
+        planned, path = item
+        delay = planned - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        status = client.get(path)
+        # Mede a partir do horário planejado: inclui o tempo na fila se o servidor atrasar
+        recorder.record(path, status, time.perf_counter() - planned)
+
+def open_loop_scheduler(args, schedule, stop):
+    rng = random.Random(0)
+    interval = 1 / args.rate
+    next_send = time.perf_counter()
+    while not stop.is_set():
+        schedule.put((next_send, pick_endpoint(rng, args.endpoints, args.weights)))
+        next_send += interval
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+def print_summary(title, stats_by_path, elapsed):
+    print(f"\n{title}")
+    print(f"{'Endpoint':<10} {'Req.':>8} {'Req/s':>9} {'Erros':>7} {'p50 ms':>8} "
+          f"{'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+    for path, stats in stats_by_path.items():
+        histogram = stats.histogram
+        error_rate = f'{stats.errors / histogram.total:.1%}' if histogram.total else '-'
+        print(f"{path:<10} {histogram.total:>8} {histogram.total / elapsed:>9.1f} {error_rate:>7} "
+              f"{histogram.percentile(50):>8.2f} {histogram.percentile(90):>8.2f} "
+              f"{histogram.percentile(99):>8.2f} {histogram.percentile(99.9):>9.2f} "
+              f"{histogram.max / 1000:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Gerador de carga do Desafio 1')
+    parser.add_argument('--url', default='http://web-server:8080', help='Endereço do servidor')
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Workers concorrentes (closed) ou conexões disponíveis (open)')
+    parser.add_argument('--rate', type=float, default=100, help='Requisições por segundo no modo open')
+    parser.add_argument('--duration', type=float, default=30, help='Segundos de teste (0 = sem fim)')
+    parser.add_argument('--interval', type=float, default=5, help='Segundos entre os resumos')
+    parser.add_argument('--endpoints', nargs='+', default=['/', '/health'])
+    parser.add_argument('--weights', nargs='+', type=float, help='Peso de cada endpoint (padrão: iguais)')
+    parser.add_argument('--timeout', type=float, default=10, help='Timeout de cada requisição')
+    args = parser.parse_args()
+
+    if args.weights and len(args.weights) != len(args.endpoints):
+        parser.error('--weights precisa de um peso por endpoint')
+    args.weights = args.weights or [1] * len(args.endpoints)
+
+    parts = urlsplit(args.url)
+    host, port = parts.hostname, parts.port or 80
+    recorder = Recorder(args.endpoints)
+    stop = threading.Event()
+    clients = [Client(host, port, args.timeout) for _ in range(args.workers)]
+
+    if args.mode == 'closed':
+        print(f"Modo closed: {args.workers} workers contra {args.url}")
+        threads = [
+            threading.Thread(target=closed_loop_worker, args=(client, args, recorder, stop, i), daemon=True)
+            for i, client in enumerate(clients)
+        ]
+    else:
+        print(f"Modo open: {args.rate} req/s com até {args.workers} conexões contra {args.url}")
+        schedule = queue.Queue()
+        threads = [
+            threading.Thread(target=open_loop_worker, args=(client, recorder, schedule), daemon=True)
+            for client in clients
+        ]
+        threads.append(threading.Thread(target=open_loop_scheduler, args=(args, schedule, stop), daemon=True))
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    try:
+        last = start
+        while not args.duration or time.perf_counter() - start < args.duration:
+            remaining = args.duration - (time.perf_counter() - start) if args.duration else args.interval
+            time.sleep(max(0, min(args.interval, remaining)))
+            now = time.perf_counter()
+            print_summary(f"[{now - start:6.1f}s] últimos {now - last:.1f}s", recorder.rotate(), now - last)
+            last = now
+    except KeyboardInterrupt:
+        pass
+
+    stop.set()
+    elapsed = time.perf_counter() - start
+    recorder.rotate()
+    connections = sum(client.connections for client in clients)
+    print_summary(f"=== Total em {elapsed:.1f}s ({connections} conexões abertas) ===", recorder.total, elapsed)
+
+if __name__ == '__main__':
+    main()
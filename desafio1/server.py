@@ -1,20 +1,31 @@
 from flask import Flask, jsonify
 from datetime import datetime
+from multiprocessing import Value
 import os
 
 app = Flask(__name__)
 
-request_count = 0
+SERVER_MODE = os.getenv('SERVER_MODE', 'development')
+WEB_WORKERS = int(os.getenv('WEB_WORKERS', os.cpu_count() or 1))
+WEB_THREADS = int(os.getenv('WEB_THREADS', 4))
+
+# Contador em memória compartilhada: criado antes do fork, é o mesmo para todos os
+# workers do gunicorn, e o lock torna o incremento atômico entre threads e processos
+request_count = Value('Q', 0)
+
+def next_request_number():
+    with request_count.get_lock():
+        request_count.value += 1
+        return request_count.value
 
 @app.route('/')
 def home():
-    global request_count
-    request_count += 1
     return jsonify({
         'message': 'Servidor Flask funcionando!',
         'timestamp': datetime.now().isoformat(),
         'hostname': os.uname().nodename,
-        'request_number': request_count
+        'pid': os.getpid(),
+        'request_number': next_request_number()
     })
 
 @app.route('/health')
@@ -24,6 +35,30 @@ def health():
         'timestamp': datetime.now().isoformat()
     })
 
+def run_production():
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', '0.0.0.0:8080')
+            self.cfg.set('workers', WEB_WORKERS)
+            # gthread mantém conexões keep-alive abertas (o worker sync fecha a cada resposta)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', WEB_THREADS)
+            self.cfg.set('keepalive', 5)
+            # O app (e o contador) é carregado no processo mestre e herdado pelos workers
+            self.cfg.set('preload_app', True)
+            self.cfg.set('accesslog', '-')
+
+        def load(self):
+            return app
+
+    print(f"Servidor iniciando na porta 8080 com {WEB_WORKERS} workers (gunicorn)...")
+    Server().run()
+
 if __name__ == '__main__':
-    print("Servidor iniciando na porta 8080...")
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    if SERVER_MODE == 'production':
+        run_production()
+    else:
+        print("Servidor iniciando na porta 8080...")
+        app.run(host='0.0.0.0', port=8080, debug=True)
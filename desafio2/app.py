@@ -1,9 +1,27 @@
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime, timedelta
+from itertools import islice
+import argparse
 import time
 import os
 
-DB_PATH = '/data/users.db'
+DB_PATH = os.getenv('DB_PATH', '/data/users.db')
+JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+BULK_CHUNK_SIZE = 1000
+
+# Migrações do esquema, aplicadas em ordem; PRAGMA user_version guarda quantas já rodaram
+MIGRATIONS = [
+    'CREATE INDEX IF NOT EXISTS idx_users_created_at ON users(created_at)',
+    'CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)',
+]
+
+def configure_connection(conn):
+    # Com WAL, synchronous=NORMAL só faz fsync no checkpoint, sem perder
+    # consistência; nos outros modos, NORMAL pode perder commits, então fica FULL.
+    # cache_size negativo é em KiB (aqui, 20 MB)
+    journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    conn.execute(f"PRAGMA synchronous={'NORMAL' if journal_mode.lower() == 'wal' else 'FULL'}")
+    conn.execute('PRAGMA cache_size=-20000')
 
 def init_database():
     print(f"Inicializando banco de dados em: {DB_PATH}")
@@ -13,6 +31,11 @@ def init_database():
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
+    # WAL: leitores não bloqueiam o escritor e cada commit só anexa ao log
+    journal_mode = cursor.execute(f'PRAGMA journal_mode={JOURNAL_MODE}').fetchone()[0]
+    configure_connection(conn)
+    print(f"Modo de journal: {journal_mode}")
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -25,8 +48,18 @@ def init_database():
     conn.commit()
     print("Tabela 'users' criada/verificada com sucesso")
     
+    migrate(conn)
+    
     return conn
 
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, statement in enumerate(MIGRATIONS[version:], start=version + 1):
+        with conn:
+            conn.execute(statement)
+            conn.execute(f'PRAGMA user_version={number}')
+        print(f"Migração {number} aplicada: {statement}")
+
 def insert_user(conn, name, email):
     cursor = conn.cursor()
     cursor.execute(
@@ -36,22 +69,102 @@ def insert_user(conn, name, email):
     conn.commit()
     return cursor.lastrowid
 
-def list_users(conn):
+def insert_users(conn, users, chunk_size=BULK_CHUNK_SIZE):
+    """Insere pares (nome, email) de qualquer iterável em transações de chunk_size linhas."""
+    users = iter(users)
+    total = 0
+    
+    while True:
+        now = datetime.now().isoformat()
+        chunk = [(name, email, now) for name, email in islice(users, chunk_size)]
+        if not chunk:
+            return total
+        with conn:
+            conn.executemany(
+                'INSERT INTO users (name, email, created_at) VALUES (?, ?, ?)',
+                chunk
+            )
+        total += len(chunk)
+
+def generate_users(count, start=1):
+    for i in range(start, start + count):
+        yield f'Usuário {i}', f'usuario{i}@email.com'
+
+def user_filters(since=None, until=None, email=None):
+    """Monta o WHERE, os parâmetros e a ordenação para os filtros informados."""
+    clauses = []
+    params = []
+    if since:
+        clauses.append('created_at >= ?')
+        params.append(since)
+    if until:
+        clauses.append('created_at < ?')
+        params.append(until)
+    if email:
+        clauses.append('email = ?')
+        params.append(email)
+    
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    # Ordenar por created_at deixa o SQLite percorrer a faixa do índice já em ordem,
+    # sem varrer a tabela pela chave primária nem ordenar em memória
+    order = 'created_at, id' if (since or until) and not email else 'id'
+    return where, params, order
+
+def list_users(conn, since=None, until=None, email=None):
+    where, params, order = user_filters(since, until, email)
     cursor = conn.cursor()
-    cursor.execute('SELECT id, name, email, created_at FROM users ORDER BY id')
+    cursor.execute(f'SELECT id, name, email, created_at FROM users {where} ORDER BY {order}', params)
     return cursor.fetchall()
 
+def day_range(day):
+    start = datetime.combine(day, datetime.min.time())
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+def list_users_created_on(conn, day):
+    since, until = day_range(day)
+    return list_users(conn, since, until)
+
+def list_users_created_today(conn):
+    return list_users_created_on(conn, date.today())
+
+def find_user_by_email(conn, email):
+    users = list_users(conn, email=email)
+    return users[0] if users else None
+
 def count_users(conn):
     cursor = conn.cursor()
     cursor.execute('SELECT COUNT(*) FROM users')
     return cursor.fetchone()[0]
 
+def generate(conn, count, chunk_size):
+    start = count_users(conn) + 1
+    print(f"Gerando {count} usuários sintéticos em lotes de {chunk_size}...")
+    
+    began = time.perf_counter()
+    inserted = insert_users(conn, generate_users(count, start), chunk_size)
+    elapsed = time.perf_counter() - began
+    
+    print(f"{inserted} usuários inseridos em {elapsed:.2f}s ({inserted / elapsed:.0f} usuários/s)")
+    print(f"Total de usuários no banco: {count_users(conn)}")
+    conn.close()
+
 def main():
+    parser = argparse.ArgumentParser(description='Aplicação de banco de dados com persistência')
+    parser.add_argument('--generate', type=int, metavar='N',
+                        help='Insere N usuários sintéticos e mede a vazão')
+    parser.add_argument('--chunk-size', type=int, default=BULK_CHUNK_SIZE,
+                        help='Usuários por transação no modo --generate')
+    args = parser.parse_args()
+    
     print("=== Aplicação de Banco de Dados com Persistência ===")
     print()
     
     conn = init_database()
     
+    if args.generate:
+        generate(conn, args.generate, args.chunk_size)
+        return
+    
     existing_users = count_users(conn)
     print(f"Usuários existentes no banco: {existing_users}")
     print()
@@ -86,7 +199,7 @@ def main():
     
     conn.close()
     print()
-    print("Dados persistidos com sucesso em /data/users.db")
+    print(f"Dados persistidos com sucesso em {DB_PATH}")
     print("Mesmo após remover o container, os dados permanecerão no volume!")
 
 if __name__ == '__main__':
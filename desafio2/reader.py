@@ -1,15 +1,94 @@
+import argparse
+import os
 import sqlite3
 import sys
+import time
+from datetime import date, datetime, timedelta
 
-DB_PATH = '/data/users.db'
+DB_PATH = os.getenv('DB_PATH', '/data/users.db')
+BATCH_SIZE = 500
 
-def read_database():
+def connect_read_only():
+    # mode=ro: o leitor nunca pede lock de escrita nem cria o arquivo do banco
+    return sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True)
+
+def iter_users(conn, after_id=0, batch_size=BATCH_SIZE, since=None, until=None, email=None):
+    clauses = []
+    params = []
+    if after_id:
+        clauses.append('id > ?')
+        params.append(after_id)
+    if since:
+        clauses.append('created_at >= ?')
+        params.append(since)
+    if until:
+        clauses.append('created_at < ?')
+        params.append(until)
+    if email:
+        clauses.append('email = ?')
+        params.append(email)
+    
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    # Na leitura inicial com filtro de data, percorre idx_users_created_at já em ordem;
+    # no --follow, os ids novos são poucos e a chave primária é o caminho mais curto
+    order = 'created_at, id' if (since or until) and not email and not after_id else 'id'
+    
+    cursor = conn.cursor()
+    cursor.execute(f'SELECT id, name, email, created_at FROM users {where} ORDER BY {order}', params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        # Fecha o cursor mesmo se o consumidor parar antes do fim (libera o lock de leitura)
+        cursor.close()
+
+def print_user(user):
+    print(f"ID: {user[0]:<4} | Nome: {user[1]:<20} | Email: {user[2]:<25} | Criado em: {user[3]}")
+
+def print_users(conn, after_id, batch_size, filters):
+    count = 0
+    last_id = after_id
+    for user in iter_users(conn, after_id, batch_size, **filters):
+        print_user(user)
+        count += 1
+        last_id = max(last_id, user[0])
+    return count, last_id
+
+def follow(conn, last_id, batch_size, interval, filters):
+    print()
+    print(f"Acompanhando novos usuários a cada {interval}s (Ctrl+C para sair)...")
+    try:
+        while True:
+            time.sleep(interval)
+            # Só busca ids maiores que o último visto, sem reler a tabela
+            count, last_id = print_users(conn, last_id, batch_size, filters)
+            if count:
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        print()
+        print(f"Leitura encerrada no ID {last_id}")
+
+def parse_timestamp(value):
+    # Normaliza para o formato gravado pelo app.py (isoformat com 'T')
+    return datetime.fromisoformat(value).isoformat()
+
+def user_filters(args):
+    since, until = args.since, args.until
+    if args.today:
+        start = datetime.combine(date.today(), datetime.min.time())
+        since, until = start.isoformat(), (start + timedelta(days=1)).isoformat()
+    return {'since': since, 'until': until, 'email': args.email}
+
+def read_database(args):
     print("=== Leitor de Banco de Dados ===")
-    print(f"Lendo banco de dados de: {DB_PATH}")
+    print(f"Lendo banco de dados de: {DB_PATH} (somente leitura)")
     print()
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_read_only()
         cursor = conn.cursor()
         
         cursor.execute(
@@ -19,27 +98,43 @@ def read_database():
             print("Tabela 'users' não encontrada!")
             return
         
-        cursor.execute('SELECT id, name, email, created_at FROM users ORDER BY id')
-        users = cursor.fetchall()
+        print("Usuários cadastrados:")
+        print("-" * 80)
+        filters = user_filters(args)
+        count, last_id = print_users(conn, 0, args.batch_size, filters)
+        print("-" * 80)
         
-        if not users:
+        if not count:
             print("Nenhum usuário encontrado no banco de dados.")
         else:
-            print(f"Total de usuários encontrados: {len(users)}")
-            print()
-            print("Usuários cadastrados:")
-            print("-" * 80)
-            for user in users:
-                print(f"ID: {user[0]:<4} | Nome: {user[1]:<20} | Email: {user[2]:<25} | Criado em: {user[3]}")
-            print("-" * 80)
+            print(f"Total de usuários encontrados: {count}")
+        
+        if args.follow:
+            follow(conn, last_id, args.batch_size, args.interval, filters)
         
         conn.close()
         print()
         print("Dados lidos com sucesso do volume persistente!")
-        
+    
     except sqlite3.OperationalError as e:
         print(f"Erro ao acessar o banco de dados: {e}")
         sys.exit(1)
 
+def main():
+    parser = argparse.ArgumentParser(description='Leitor do banco de dados de usuários')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Linhas lidas do cursor por vez')
+    parser.add_argument('--follow', action='store_true',
+                        help='Continua lendo os usuários inseridos depois')
+    parser.add_argument('--interval', type=float, default=2,
+                        help='Segundos entre as consultas no modo --follow')
+    parser.add_argument('--since', type=parse_timestamp,
+                        help='Só usuários criados a partir desta data/hora (ISO, ex.: 2025-01-31)')
+    parser.add_argument('--until', type=parse_timestamp,
+                        help='Só usuários criados antes desta data/hora (ISO)')
+    parser.add_argument('--today', action='store_true', help='Só usuários criados hoje')
+    parser.add_argument('--email', help='Só o usuário com este email')
+    read_database(parser.parse_args())
+
 if __name__ == '__main__':
-    read_database()
+    main()
@@ -0,0 +1,178 @@
+"""Teste de concorrência no banco SQLite compartilhado do Desafio 2.
+
+Inicia vários processos escritores (usando insert_user, um commit por usuário)
+e leitores (usando a consulta do reader.py) sobre o mesmo arquivo, primeiro no
+modo rollback journal (DELETE) e depois em WAL, e compara os resultados.
+
+Exemplo:
+    python stress.py --writers 4 --readers 4 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import time
+from itertools import islice
+
+import app
+import reader
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+def open_connection(path, busy_timeout, read_only=False):
+    if read_only:
+        reader.DB_PATH = path
+        conn = reader.connect_read_only()
+    else:
+        # Espera generosa só na abertura, para os PRAGMAs não falharem no início
+        conn = sqlite3.connect(path, timeout=10)
+        app.configure_connection(conn)
+    # O próprio SQLite espera até busy_timeout ms antes de devolver SQLITE_BUSY
+    conn.execute(f'PRAGMA busy_timeout={busy_timeout}')
+    return conn
+
+def with_retry(operation, conn, stats, retries):
+    """Executa a operação, repetindo com backoff exponencial se o banco estiver travado.
+
+    A latência registrada vai da primeira tentativa ao sucesso: inclui a espera dentro
+    do busy_timeout, as tentativas que falharam e o backoff. retry_wait soma só o tempo
+    das tentativas que terminaram em "database is locked" e do backoff após elas.
+    """
+    delay = 0.001
+    first = time.perf_counter()
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            result = operation()
+            stats['latencies'].append(time.perf_counter() - first)
+            return result
+        except sqlite3.OperationalError as e:
+            if not is_locked(e):
+                raise
+            conn.rollback()
+            stats['locked'] += 1
+            if attempt == retries:
+                stats['failed'] += 1
+                stats['retry_wait'] += time.perf_counter() - start
+                return None
+            sleep = random.uniform(0, delay)
+            time.sleep(sleep)
+            stats['retry_wait'] += time.perf_counter() - start
+            delay = min(delay * 2, 0.1)
+
+def new_stats():
+    return {'ops': 0, 'rows': 0, 'locked': 0, 'failed': 0, 'retry_wait': 0.0, 'latencies': []}
+
+def writer(worker_id, path, args, deadline, results):
+    stats = new_stats()
+    try:
+        conn = open_connection(path, args.busy_timeout)
+        count = 0
+        while time.monotonic() < deadline:
+            count += 1
+            name = f'Escritor {worker_id}-{count}'
+            email = f'escritor{worker_id}-{count}@email.com'
+            if with_retry(lambda: app.insert_user(conn, name, email), conn, stats, args.retries):
+                stats['ops'] += 1
+                stats['rows'] += 1
+        conn.close()
+    finally:
+        # Sempre reporta, para o processo principal não esperar para sempre
+        results.put(('writer', stats))
+
+def read_page(conn, max_id, rows):
+    after_id = random.randint(0, max(0, max_id - rows))
+    return len(list(islice(reader.iter_users(conn, after_id), rows)))
+
+def reader_worker(path, args, deadline, results):
+    stats = new_stats()
+    try:
+        conn = open_connection(path, args.busy_timeout, read_only=True)
+        while time.monotonic() < deadline:
+            read = with_retry(lambda: read_page(conn, args.seed, args.read_rows), conn, stats, args.retries)
+            if read is not None:
+                stats['ops'] += 1
+                stats['rows'] += read
+        conn.close()
+    finally:
+        results.put(('reader', stats))
+
+def prepare_database(path, mode, seed):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    app.DB_PATH = path
+    app.JOURNAL_MODE = mode
+    conn = app.init_database()
+    app.insert_users(conn, app.generate_users(seed))
+    conn.close()
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_mode(mode, args):
+    path = os.path.join(args.dir, f'stress-{mode.lower()}.db')
+    prepare_database(path, mode, args.seed)
+    print(f"Executando {args.writers} escritores e {args.readers} leitores em {mode} por {args.duration}s...")
+    
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + args.duration
+    processes = [
+        multiprocessing.Process(target=writer, args=(i, path, args, deadline, results))
+        for i in range(args.writers)
+    ] + [
+        multiprocessing.Process(target=reader_worker, args=(path, args, deadline, results))
+        for _ in range(args.readers)
+    ]
+    for process in processes:
+        process.start()
+    
+    totals = {'writer': new_stats(), 'reader': new_stats()}
+    for _ in processes:
+        role, stats = results.get()
+        for key in ('ops', 'rows', 'locked', 'failed', 'retry_wait'):
+            totals[role][key] += stats[key]
+        totals[role]['latencies'] += stats['latencies']
+    for process in processes:
+        process.join()
+    
+    writes, reads = totals['writer'], totals['reader']
+    return {
+        'commits/s': writes['ops'] / args.duration,
+        'leituras/s': reads['ops'] / args.duration,
+        'linhas lidas/s': reads['rows'] / args.duration,
+        'commit p99 (ms)': percentile(writes['latencies'], 99) * 1000,
+        'leitura p99 (ms)': percentile(reads['latencies'], 99) * 1000,
+        'espera em retries (s)': writes['retry_wait'] + reads['retry_wait'],
+        '"database is locked"': writes['locked'] + reads['locked'],
+        'falhas após retries': writes['failed'] + reads['failed']
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de concorrência do SQLite compartilhado')
+    parser.add_argument('--writers', type=int, default=4, help='Processos escritores')
+    parser.add_argument('--readers', type=int, default=4, help='Processos leitores')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos por modo')
+    parser.add_argument('--busy-timeout', type=int, default=100, help='PRAGMA busy_timeout em ms')
+    parser.add_argument('--retries', type=int, default=5, help='Novas tentativas após "database is locked"')
+    parser.add_argument('--read-rows', type=int, default=100, help='Linhas por leitura')
+    parser.add_argument('--seed', type=int, default=10000, help='Usuários criados antes do teste')
+    parser.add_argument('--dir', default=os.path.dirname(app.DB_PATH), help='Diretório dos bancos de teste')
+    parser.add_argument('--modes', nargs='+', default=['DELETE', 'WAL'], help='Modos de journal comparados')
+    args = parser.parse_args()
+    
+    results = {mode: run_mode(mode, args) for mode in args.modes}
+    
+    print()
+    print(f"{'Métrica':<24}" + ''.join(f'{mode:>12}' for mode in args.modes))
+    print("-" * (24 + 12 * len(args.modes)))
+    for metric in results[args.modes[0]]:
+        print(f'{metric:<24}' + ''.join(f'{results[mode][metric]:>12.1f}' for mode in args.modes))
+
+if __name__ == '__main__':
+    main()
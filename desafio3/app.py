@@ -1,37 +1,1061 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
 import redis
 import os
+import hashlib
 import json
+import math
+import random
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
 
 app = Flask(__name__)
 
 DB_CONFIG = {
-    'host': 'db',
-    'database': 'appdb',
-    'user': 'user',
-    'password': 'password'
+    'host': os.getenv('DB_HOST', 'db'),
+    'port': int(os.getenv('DB_PORT', 5432)),
+    'database': os.getenv('DB_NAME', 'appdb'),
+    'user': os.getenv('DB_USER', 'user'),
+    'password': os.getenv('DB_PASSWORD', 'password')
 }
 
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+DB_POOL_VALIDATE_AFTER = float(os.getenv('DB_POOL_VALIDATE_AFTER', 30))
+
 REDIS_HOST = os.getenv('REDIS_HOST', 'cache')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 
+USERS_PAGE_LIMIT = int(os.getenv('USERS_PAGE_LIMIT', 100))
+USERS_PAGE_MAX = int(os.getenv('USERS_PAGE_MAX', 1000))
+USERS_EXPORT_CHUNK = int(os.getenv('USERS_EXPORT_CHUNK', 1000))
+USERS_CACHE_TTL = 60
+USERS_VERSION_KEY = 'users:version'
+USERS_COUNT_KEY = 'users:count'
+USER_CACHE_TTL = 300
+USERS_BATCH_MAX = int(os.getenv('USERS_BATCH_MAX', 100))
+USERS_SEARCH_LIMIT = int(os.getenv('USERS_SEARCH_LIMIT', 20))
+USERS_SEARCH_FIELDS = ('name', 'email')
+
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', 1000))
+BULK_MAX_ERRORS = int(os.getenv('BULK_MAX_ERRORS', 100))
+
+CACHE_STALE_GRACE = int(os.getenv('CACHE_STALE_GRACE', 30))
+CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', 10))
+CACHE_LOCK_WAIT = float(os.getenv('CACHE_LOCK_WAIT', 2))
+CACHE_EARLY_REFRESH_BETA = float(os.getenv('CACHE_EARLY_REFRESH_BETA', 1.0))
+
+L1_CACHE_SIZE = int(os.getenv('L1_CACHE_SIZE', 1024))
+L1_CACHE_TTL = float(os.getenv('L1_CACHE_TTL', 5))
+CACHE_INVALIDATION_CHANNEL = 'cache:invalidate'
+CACHE_COMPRESS_THRESHOLD = int(os.getenv('CACHE_COMPRESS_THRESHOLD', 1024))
+
 try:
     cache = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
     cache.ping()
+    # Cliente sem decodificação para as entradas binárias (corpos comprimidos)
+    cache_raw = redis.Redis(host=REDIS_HOST, port=REDIS_PORT)
     print(f"Conectado ao Redis em {REDIS_HOST}:{REDIS_PORT}")
 except Exception as e:
     print(f"Erro ao conectar ao Redis: {e}")
     cache = None
+    cache_raw = None
+
+class PoolTimeout(Exception):
+    pass
+
+class DatabaseUnavailable(Exception):
+    pass
+
+class StaleUserPages(Exception):
+    pass
+
+class ConnectionPool:
+    """Pool de conexões PostgreSQL limitado e thread-safe.
+
+    Conexões ociosas há mais de `validate_after` segundos são testadas
+    com `SELECT 1` antes de serem entregues; conexões quebradas são
+    descartadas e substituídas por novas.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, validate_after, **config):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self._config = config
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._size = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        return psycopg2.connect(**self._config)
+
+    def ping(self, conn):
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def prefill(self):
+        while True:
+            with self._cond:
+                if self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn = None
+        last_used = 0.0
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.maxconn:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available after {self.timeout}s'
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if conn is not None and (
+                conn.closed
+                or (time.monotonic() - last_used > self.validate_after
+                    and not self.ping(conn))
+            ):
+                self._close(conn)
+                conn = None
+                with self._cond:
+                    self._discarded += 1
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return conn
+
+    def putconn(self, conn, discard=False):
+        if not discard and not conn.closed:
+            status = conn.get_transaction_status()
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or conn.closed:
+                self._size -= 1
+                self._discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'avg_wait_ms': round(
+                    self._wait_total / self._checkouts * 1000, 3
+                ) if self._checkouts else 0,
+                'max_wait_ms': round(self._wait_max * 1000, 3)
+            }
 
+db_pool = ConnectionPool(
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_TIMEOUT,
+    DB_POOL_VALIDATE_AFTER,
+    **DB_CONFIG
+)
+
+try:
+    db_pool.prefill()
+    print(f"Pool de conexões criado ({DB_POOL_MIN}-{DB_POOL_MAX}) em {DB_CONFIG['host']}")
+except Exception as e:
+    print(f"Erro ao preencher o pool de conexões: {e}")
+
+@contextmanager
 def get_db_connection():
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
+        conn = db_pool.getconn()
     except Exception as e:
         print(f"Erro ao conectar ao banco: {e}")
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        db_pool.putconn(conn)
+
+class LocalCache:
+    """Cache LRU em memória (L1), por worker, na frente do Redis (L2).
+
+    Cada valor expira em no máximo `ttl` segundos, ou antes, se a entrada
+    do Redis expirar primeiro. Outros workers avisam sobre alterações pelo
+    canal de pub/sub CACHE_INVALIDATION_CHANNEL.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key, record=True):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] > time.time():
+                self._data.move_to_end(key)
+                if record:
+                    self._hits += 1
+                return item[0]
+            if item is not None:
+                del self._data[key]
+            if record:
+                self._misses += 1
+            return None
+
+    def set(self, key, value, expires_at=None):
+        expires_at = min(time.time() + self.ttl, expires_at or float('inf'))
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': True,
+                'max_size': self.maxsize,
+                'ttl': self.ttl,
+                'size': len(self._data),
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0
+            }
+
+l1 = LocalCache(L1_CACHE_SIZE, L1_CACHE_TTL) if L1_CACHE_SIZE > 0 else None
+
+l2_counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'errors': 0}
+l2_counters_lock = threading.Lock()
+
+def count_l2(name):
+    with l2_counters_lock:
+        l2_counters[name] += 1
+
+def l2_stats():
+    with l2_counters_lock:
+        counters = dict(l2_counters)
+    lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+    counters['hit_ratio'] = round(
+        (counters['hits'] + counters['stale_hits']) / lookups, 4
+    ) if lookups else 0
+    return counters
+
+def publish_invalidation(*keys):
+    if l1:
+        l1.delete(*keys)
+    if cache:
+        try:
+            cache.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys))
+        except Exception as e:
+            print(f"Erro ao publicar invalidação: {e}")
+
+def listen_invalidations():
+    while True:
+        try:
+            pubsub = cache.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            # Mensagens perdidas enquanto desconectado não voltam: começa limpo
+            l1.clear()
+            for message in pubsub.listen():
+                if message['type'] == 'message':
+                    l1.delete(*json.loads(message['data']))
+        except Exception as e:
+            print(f"Erro no canal de invalidação: {e}")
+            time.sleep(1)
+
+if l1 and cache:
+    threading.Thread(target=listen_invalidations, daemon=True).start()
+
+def encode_body(payload):
+    return json.dumps(payload).encode()
+
+def encode_cache_entry(body, delta, expires_at, etag=None):
+    # Formato: metadados em JSON, quebra de linha e o corpo da resposta já
+    # serializado (comprimido com zlib acima de CACHE_COMPRESS_THRESHOLD)
+    compressed = 0 < CACHE_COMPRESS_THRESHOLD <= len(body)
+    meta = {
+        'etag': etag or hashlib.blake2b(body, digest_size=16).hexdigest(),
+        'delta': delta,
+        'expires_at': expires_at,
+        'compressed': compressed
+    }
+    return json.dumps(meta).encode() + b'\n' + (zlib.compress(body) if compressed else body)
+
+def decode_cache_entry(raw):
+    meta, _, payload = raw.partition(b'\n')
+    entry = json.loads(meta)
+    entry['body'] = zlib.decompress(payload) if entry.pop('compressed') else payload
+    return entry
+
+def read_cache_entry(key):
+    raw = cache_raw.get(key)
+    return decode_cache_entry(raw) if raw else None
+
+def write_cache_entry(key, body, ttl, delta):
+    # A chave vive ttl + CACHE_STALE_GRACE no Redis; depois de expires_at o
+    # valor ainda pode ser servido como stale enquanto outro worker recalcula
+    raw = encode_cache_entry(body, delta, time.time() + ttl)
+    if cache_raw:
+        try:
+            cache_raw.setex(key, ttl + CACHE_STALE_GRACE, raw)
+        except Exception as e:
+            print(f"Erro ao armazenar no cache: {e}")
+    return decode_cache_entry(raw)
+
+def cached_response(entry, source):
+    # Injeta "source" no corpo armazenado sem decodificar o JSON
+    response = Response(
+        b'{"source": "' + source.encode() + b'", ' + entry['body'][1:],
+        mimetype='application/json'
+    )
+    # ETag fraca: o corpo varia no campo "source", o conteúdo não
+    response.set_etag(entry['etag'], weak=True)
+    return response.make_conditional(request)
+
+def should_refresh(entry, now):
+    # Renovação antecipada probabilística (XFetch): quanto mais perto de
+    # expirar e mais caro o recálculo (delta), maior a chance de renovar
+    jitter = entry['delta'] * CACHE_EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+    return now - jitter >= entry['expires_at']
+
+def recompute(key, ttl, loader):
+    start = time.monotonic()
+    payload = loader()
+    if payload is None:
         return None
+    entry = write_cache_entry(key, encode_body(payload), ttl, time.monotonic() - start)
+    if l1:
+        l1.set(key, entry, entry['expires_at'])
+    return entry
+
+def cached_fetch(key, ttl, loader):
+    """Lê `key` do cache ou recalcula com `loader()` sem efeito manada.
+
+    Apenas o worker que obtém o lock `lock:<key>` consulta o banco; os
+    demais recebem o valor stale (se existir) ou aguardam até
+    CACHE_LOCK_WAIT segundos pelo valor recalculado. Retorna
+    `(entrada, origem)`, com origem 'local-cache', 'cache', 'stale-cache'
+    ou 'database'; a entrada traz o corpo serializado e a ETag, ou é None
+    se o loader não encontrou nada.
+    """
+    if l1:
+        entry = l1.get(key)
+        if entry is not None:
+            return entry, 'local-cache'
+    
+    if not cache:
+        return recompute(key, ttl, loader), 'database'
+    
+    try:
+        entry = read_cache_entry(key)
+        now = time.time()
+        if entry and not should_refresh(entry, now):
+            count_l2('hits')
+            if l1:
+                l1.set(key, entry, entry['expires_at'])
+            return entry, 'cache'
+        
+        lock = cache.lock(f'lock:{key}', timeout=CACHE_LOCK_TIMEOUT)
+        acquired = lock.acquire(blocking=False)
+    except Exception as e:
+        print(f"Erro ao acessar cache: {e}")
+        count_l2('errors')
+        return recompute(key, ttl, loader), 'database'
+    
+    if entry:
+        count_l2('hits' if now < entry['expires_at'] else 'stale_hits')
+    else:
+        count_l2('misses')
+    
+    if acquired:
+        try:
+            return recompute(key, ttl, loader), 'database'
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                pass
+    
+    if entry:
+        return entry, 'cache' if now < entry['expires_at'] else 'stale-cache'
+    
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        try:
+            entry = read_cache_entry(key)
+        except Exception:
+            break
+        if entry:
+            if l1:
+                l1.set(key, entry, entry['expires_at'])
+            return entry, 'cache'
+    
+    return recompute(key, ttl, loader), 'database'
+
+USER_BODY_PREFIX = b'{"user": '
+
+def user_body(user):
+    return encode_body({'user': user})
+
+def user_json(body):
+    # Extrai o objeto do usuário de um corpo {"user": {...}} sem decodificá-lo
+    return body[len(USER_BODY_PREFIX):-1]
+
+def row_to_user(row):
+    return {
+        'id': row[0],
+        'name': row[1],
+        'email': row[2],
+        'created_at': row[3].isoformat() if row[3] else None
+    }
+
+def users_cache_version():
+    if not cache:
+        return 0
+    if l1:
+        version = l1.get(USERS_VERSION_KEY, record=False)
+        if version is not None:
+            return version
+    try:
+        version = int(cache.get(USERS_VERSION_KEY) or 0)
+    except Exception as e:
+        print(f"Erro ao acessar cache: {e}")
+        return 0
+    if l1:
+        l1.set(USERS_VERSION_KEY, version)
+    return version
+
+def adjust_users_count(delta):
+    # Só incrementa se o contador já existir; caso contrário ele seria
+    # criado a partir de zero com um valor errado
+    if cache and delta:
+        try:
+            cache.eval(
+                "if redis.call('exists', KEYS[1]) == 1 then "
+                "return redis.call('incrby', KEYS[1], ARGV[1]) end",
+                1, USERS_COUNT_KEY, delta
+            )
+        except Exception as e:
+            print(f"Erro ao atualizar contador de usuários: {e}")
+
+def count_users_exact():
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        cur = conn.cursor()
+        cur.execute('SELECT COUNT(*) FROM users')
+        count = cur.fetchone()[0]
+        cur.close()
+    if cache:
+        try:
+            cache.set(USERS_COUNT_KEY, count)
+        except Exception as e:
+            print(f"Erro ao atualizar contador de usuários: {e}")
+    return count
+
+def users_count(exact=False):
+    """Retorna `(total, origem)` sem varrer a tabela quando possível.
+
+    Usa o contador mantido no Redis ('counter'); sem ele, a estimativa do
+    planejador em pg_class ('estimate'). `exact=True` faz o COUNT(*) e
+    ressincroniza o contador.
+    """
+    if exact:
+        return count_users_exact(), 'exact'
+    
+    if cache:
+        try:
+            count = cache.get(USERS_COUNT_KEY)
+            if count is not None:
+                return int(count), 'counter'
+        except Exception as e:
+            print(f"Erro ao acessar cache: {e}")
+    
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        cur = conn.cursor()
+        cur.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass")
+        estimate = cur.fetchone()[0]
+        cur.close()
+    
+    # reltuples é -1 enquanto a tabela nunca passou por VACUUM/ANALYZE
+    if estimate < 0:
+        return count_users_exact(), 'exact'
+    return estimate, 'estimate'
+
+def init_users_count():
+    try:
+        if cache and not cache.exists(USERS_COUNT_KEY):
+            count_users_exact()
+            print("Contador de usuários inicializado")
+    except Exception as e:
+        print(f"Erro ao inicializar contador de usuários: {e}")
+
+threading.Thread(target=init_users_count, daemon=True).start()
+
+def invalidate_user_pages():
+    # As chaves das páginas incluem a versão: incrementá-la invalida todas
+    # de uma vez (O(1)); as antigas expiram sozinhas pelo TTL
+    if cache:
+        try:
+            cache.incr(USERS_VERSION_KEY)
+            publish_invalidation(USERS_VERSION_KEY)
+            print("Cache invalidado")
+        except Exception as e:
+            print(f"Erro ao invalidar cache: {e}")
+
+def append_user_to_cached_pages(user):
+    """Write-through de um usuário recém-criado nas páginas do cache.
+
+    Como os ids são crescentes, um usuário novo só altera as páginas finais
+    (com `next_after_id` nulo), registradas em `users:tail:v<versão>`. Se os
+    ids chegarem fora de ordem, a versão é incrementada e as páginas são
+    recalculadas sob demanda.
+    """
+    if not cache:
+        return
+    
+    version = users_cache_version()
+    tail_key = f'users:tail:v{version}'
+    max_id_key = f'users:max-id:v{version}'
+    updated_keys = []
+    
+    def append(pipe):
+        if user['id'] < int(pipe.get(max_id_key) or 0):
+            raise StaleUserPages()
+        
+        page_keys = sorted(key.decode() for key in pipe.smembers(tail_key))
+        if page_keys:
+            pipe.watch(*page_keys)
+        
+        updates = {}
+        full = []
+        for key, raw in zip(page_keys, pipe.mget(page_keys) if page_keys else []):
+            if raw is None:
+                full.append(key)
+                continue
+            entry = decode_cache_entry(raw)
+            page = json.loads(entry['body'])
+            if user['id'] <= page['after_id']:
+                continue
+            last_id = page['users'][-1]['id'] if page['users'] else page['after_id']
+            if last_id > user['id']:
+                raise StaleUserPages()
+            if last_id == user['id']:
+                continue
+            page['users'].append(user)
+            if len(page['users']) >= page['limit']:
+                page['next_after_id'] = user['id']
+                full.append(key)
+            updates[key] = encode_cache_entry(
+                encode_body(page), entry['delta'], entry['expires_at']
+            )
+        
+        pipe.multi()
+        updated_keys[:] = updates
+        for key, raw in updates.items():
+            pipe.set(key, raw, keepttl=True)
+        if full:
+            pipe.srem(tail_key, *full)
+        pipe.set(max_id_key, user['id'], ex=USERS_CACHE_TTL + CACHE_STALE_GRACE)
+    
+    try:
+        cache_raw.transaction(append, tail_key, max_id_key)
+        if updated_keys:
+            publish_invalidation(*updated_keys)
+        print("Páginas de usuários atualizadas no cache")
+    except StaleUserPages:
+        invalidate_user_pages()
+    except Exception as e:
+        print(f"Erro ao atualizar cache: {e}")
+
+def register_tail_page(version, cache_key, entry):
+    """Registra uma página final recém-lida em `users:tail:v<versão>`.
+
+    Um POST que termine entre a leitura da página no banco e este registro não
+    a encontra no conjunto e só avança `users:max-id`. Por isso, na mesma
+    transação (WATCH/MULTI) do POST, a página só é registrada se nenhum id
+    maior que o seu último já foi criado; senão é removida do cache e a função
+    retorna False.
+    """
+    tail_key = f'users:tail:v{version}'
+    max_id_key = f'users:max-id:v{version}'
+    page = json.loads(entry['body'])
+    last_id = page['users'][-1]['id'] if page['users'] else page['after_id']
+    
+    def register(pipe):
+        if int(pipe.get(max_id_key) or 0) > last_id:
+            raise StaleUserPages()
+        pipe.multi()
+        pipe.sadd(tail_key, cache_key)
+        pipe.expire(tail_key, USERS_CACHE_TTL + CACHE_STALE_GRACE)
+    
+    try:
+        cache_raw.transaction(register, max_id_key)
+        return True
+    except StaleUserPages:
+        try:
+            cache.delete(cache_key)
+        except Exception as e:
+            print(f"Erro ao invalidar cache: {e}")
+        publish_invalidation(cache_key)
+        return False
+    except Exception as e:
+        print(f"Erro ao armazenar no cache: {e}")
+        return True
+
+def load_users_page(after_id, limit):
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        
+        cur = conn.cursor()
+        cur.execute(
+            'SELECT id, name, email, created_at FROM users '
+            'WHERE id > %s ORDER BY id LIMIT %s',
+            (after_id, limit)
+        )
+        rows = cur.fetchall()
+        cur.close()
+    
+    return {
+        'users': [row_to_user(row) for row in rows],
+        'after_id': after_id,
+        'limit': limit,
+        'next_after_id': rows[-1][0] if len(rows) == limit else None
+    }
+
+def load_user(user_id):
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        
+        cur = conn.cursor()
+        cur.execute('SELECT id, name, email, created_at FROM users WHERE id = %s', (user_id,))
+        row = cur.fetchone()
+        cur.close()
+    
+    return {'user': row_to_user(row)} if row else None
+
+def load_user_by_email(email):
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        
+        cur = conn.cursor()
+        cur.execute('SELECT id, name, email, created_at FROM users WHERE email = %s', (email,))
+        row = cur.fetchone()
+        cur.close()
+    
+    return {'user': row_to_user(row)} if row else None
+
+def search_users(field, prefix, after, limit):
+    # Os índices idx_users_<campo>_prefix usam a collation "C": o LIKE 'prefixo%'
+    # vira uma faixa do índice, que também já entrega a ordem da paginação
+    column = f'lower({field}) COLLATE "C"'
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    after_key, after_id = after or ('', 0)
+    
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        
+        cur = conn.cursor()
+        cur.execute(
+            f'SELECT id, name, email, created_at, {column} FROM users '
+            f'WHERE {column} LIKE %s AND ({column}, id) > (%s, %s) '
+            f'ORDER BY {column}, id LIMIT %s',
+            (pattern, after_key, after_id, limit)
+        )
+        rows = cur.fetchall()
+        cur.close()
+    
+    return {
+        'users': [row_to_user(row) for row in rows],
+        'field': field,
+        'q': prefix,
+        'limit': limit,
+        'next_after': f'{rows[-1][0]}:{rows[-1][4]}' if len(rows) == limit else None
+    }
+
+def load_users_by_ids(user_ids):
+    with get_db_connection() as conn:
+        if not conn:
+            raise DatabaseUnavailable()
+        
+        cur = conn.cursor()
+        cur.execute(
+            'SELECT id, name, email, created_at FROM users WHERE id = ANY(%s)',
+            (list(user_ids),)
+        )
+        rows = cur.fetchall()
+        cur.close()
+    
+    return {row[0]: row_to_user(row) for row in rows}
+
+def get_users_batch():
+    try:
+        user_ids = list(dict.fromkeys(
+            int(part) for part in request.args['ids'].split(',') if part.strip()
+        ))
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+    
+    if not 1 <= len(user_ids) <= USERS_BATCH_MAX:
+        return jsonify({'error': f'ids must contain between 1 and {USERS_BATCH_MAX} ids'}), 400
+    
+    found = {}
+    sources = {'local-cache': 0, 'cache': 0, 'database': 0}
+    
+    if l1:
+        for user_id in user_ids:
+            entry = l1.get(f'user:{user_id}')
+            if entry is not None:
+                found[user_id] = user_json(entry['body'])
+                sources['local-cache'] += 1
+    
+    # Um único MGET para todas as chaves que não estavam no L1
+    pending = [user_id for user_id in user_ids if user_id not in found]
+    if cache and pending:
+        try:
+            raws = cache_raw.mget([f'user:{user_id}' for user_id in pending])
+            now = time.time()
+            for user_id, raw in zip(pending, raws):
+                entry = decode_cache_entry(raw) if raw else None
+                if entry and now < entry['expires_at']:
+                    found[user_id] = user_json(entry['body'])
+                    sources['cache'] += 1
+                    count_l2('hits')
+                    if l1:
+                        l1.set(f'user:{user_id}', entry, entry['expires_at'])
+                else:
+                    count_l2('misses')
+        except Exception as e:
+            print(f"Erro ao acessar cache: {e}")
+            count_l2('errors')
+    
+    # Uma única consulta para todos os misses, e um pipeline para reabastecer
+    pending = [user_id for user_id in user_ids if user_id not in found]
+    if pending:
+        try:
+            start = time.monotonic()
+            loaded = load_users_by_ids(pending)
+            delta = time.monotonic() - start
+        except DatabaseUnavailable:
+            return jsonify({'error': 'Database connection failed'}), 500
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        
+        expires_at = time.time() + USER_CACHE_TTL
+        raws = {
+            user_id: encode_cache_entry(user_body(user_data), delta, expires_at)
+            for user_id, user_data in loaded.items()
+        }
+        for user_id, raw in raws.items():
+            entry = decode_cache_entry(raw)
+            found[user_id] = user_json(entry['body'])
+            if l1:
+                l1.set(f'user:{user_id}', entry, expires_at)
+        sources['database'] += len(loaded)
+        
+        if cache and raws:
+            try:
+                pipe = cache_raw.pipeline(transaction=False)
+                for user_id, raw in raws.items():
+                    pipe.setex(f'user:{user_id}', USER_CACHE_TTL + CACHE_STALE_GRACE, raw)
+                pipe.execute()
+            except Exception as e:
+                print(f"Erro ao armazenar no cache: {e}")
+    
+    print(f"Lote de {len(user_ids)} usuários obtido de: {sources}")
+    # Monta a resposta concatenando os usuários já serializados
+    body = b''.join([
+        b'{"sources": ', encode_body(sources),
+        b', "users": [',
+        b', '.join(found[user_id] for user_id in user_ids if user_id in found),
+        b'], "not_found": ',
+        encode_body([user_id for user_id in user_ids if user_id not in found]),
+        b'}'
+    ])
+    return Response(body, mimetype='application/json')
+
+def list_users_page():
+    try:
+        after_id = int(request.args.get('after_id', 0))
+        limit = int(request.args.get('limit', USERS_PAGE_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'after_id and limit must be integers'}), 400
+    
+    if after_id < 0 or not 1 <= limit <= USERS_PAGE_MAX:
+        return jsonify({
+            'error': f'after_id must be >= 0 and limit between 1 and {USERS_PAGE_MAX}'
+        }), 400
+    
+    version = users_cache_version()
+    cache_key = f'users:page:v{version}:{after_id}:{limit}'
+    
+    for attempt in range(2):
+        loaded_tail = []
+        
+        def load():
+            page = load_users_page(after_id, limit)
+            if page['next_after_id'] is None:
+                loaded_tail.append(True)
+            return page
+        
+        try:
+            entry, source = cached_fetch(cache_key, USERS_CACHE_TTL, load)
+        except DatabaseUnavailable:
+            return jsonify({'error': 'Database connection failed'}), 500
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        
+        # Página final: novos usuários serão anexados a ela no POST. Se um POST passou
+        # entre a leitura e o registro, a página foi descartada e é lida de novo
+        if not (cache and loaded_tail and entry) or register_tail_page(version, cache_key, entry):
+            break
+    
+    print(f"Página de usuários após {after_id} obtida de: {source}")
+    return cached_response(entry, source)
+
+def export_users():
+    ndjson = request.args.get('format') == 'ndjson'
+    
+    try:
+        conn = db_pool.getconn()
+    except Exception as e:
+        print(f"Erro ao conectar ao banco: {e}")
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    released = []
+    
+    def release():
+        if not released:
+            released.append(True)
+            db_pool.putconn(conn)
+    
+    def generate():
+        # Cursor nomeado: o PostgreSQL mantém o resultado no servidor e
+        # entrega USERS_EXPORT_CHUNK linhas por vez
+        cur = conn.cursor(name='users_export')
+        cur.itersize = USERS_EXPORT_CHUNK
+        try:
+            cur.execute('SELECT id, name, email, created_at FROM users ORDER BY id')
+            if not ndjson:
+                yield '{"source": "database", "users": ['
+            first = True
+            while True:
+                rows = cur.fetchmany(USERS_EXPORT_CHUNK)
+                if not rows:
+                    break
+                encoded = [json.dumps(row_to_user(row)) for row in rows]
+                if ndjson:
+                    yield '\n'.join(encoded) + '\n'
+                else:
+                    yield ('' if first else ',') + ','.join(encoded)
+                first = False
+            if not ndjson:
+                yield ']}'
+        except Exception as e:
+            print(f"Erro ao exportar usuários: {e}")
+            # Repassa o erro: o servidor interrompe a resposta em andamento e o cliente
+            # vê uma transferência incompleta, em vez de um JSON/NDJSON truncado com 200
+            raise
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                pass
+            release()
+    
+    response = Response(
+        generate(),
+        mimetype='application/x-ndjson' if ndjson else 'application/json'
+    )
+    response.call_on_close(release)
+    return response
+
+class Metrics:
+    """Contadores e histogramas de latência por endpoint, em memória.
+
+    Exportados no formato texto do Prometheus em /metrics.
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._latency = {}
+
+    def observe(self, method, endpoint, status, seconds):
+        with self._lock:
+            key = (method, endpoint, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get((method, endpoint))
+            if histogram is None:
+                histogram = self._latency[(method, endpoint)] = {
+                    'buckets': [0] * len(self.BUCKETS),
+                    'sum': 0.0,
+                    'count': 0
+                }
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+    def render(self):
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {
+                key: {**value, 'buckets': list(value['buckets'])}
+                for key, value in self._latency.items()
+            }
+        
+        lines = [
+            '# HELP webapp_http_requests_total Requisições HTTP por endpoint e status.',
+            '# TYPE webapp_http_requests_total counter'
+        ]
+        for (method, endpoint, status), count in sorted(requests.items()):
+            lines.append(
+                f'webapp_http_requests_total{{method="{method}",endpoint="{endpoint}",'
+                f'status="{status}"}} {count}'
+            )
+        
+        lines += [
+            '# HELP webapp_http_request_duration_seconds Latência das requisições HTTP.',
+            '# TYPE webapp_http_request_duration_seconds histogram'
+        ]
+        for (method, endpoint), histogram in sorted(latency.items()):
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, count in zip(self.BUCKETS, histogram['buckets']):
+                cumulative += count
+                lines.append(
+                    f'webapp_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'webapp_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}'
+            )
+            lines.append(f'webapp_http_request_duration_seconds_sum{{{labels}}} {histogram["sum"]:.6f}')
+            lines.append(f'webapp_http_request_duration_seconds_count{{{labels}}} {histogram["count"]}')
+        return lines
+
+metrics = Metrics()
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Em respostas em streaming, mede o tempo até o início do corpo
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe(
+            request.method, endpoint, response.status_code, time.perf_counter() - start
+        )
+    return response
 
 @app.route('/')
 def home():
@@ -42,11 +1066,17 @@ def home():
         'endpoints': {
             '/': 'Informações do sistema',
             '/health': 'Health check',
-            '/users': 'Lista todos os usuários (GET) ou cria novo (POST)',
+            '/users': 'Exporta todos os usuários em streaming (GET) ou cria novo (POST)',
+            '/users?after_id=&limit=': 'Lista usuários paginados por id',
+            '/users?ids=1,2,3': 'Busca vários usuários de uma vez',
+            '/users/bulk': 'Cria usuários em lote a partir de JSON ou NDJSON (POST)',
             '/users/<id>': 'Detalhes de um usuário',
+            '/users/by-email/<email>': 'Busca um usuário pelo email',
+            '/users/search?q=&field=name|email': 'Busca paginada por prefixo do nome ou email',
             '/cache/set': 'Define valor no cache (POST)',
             '/cache/get/<key>': 'Obtém valor do cache',
-            '/stats': 'Estatísticas do sistema'
+            '/stats': 'Estatísticas do sistema',
+            '/metrics': 'Métricas no formato Prometheus'
         }
     })
 
@@ -55,12 +1085,9 @@ def health():
     db_status = 'connected'
     cache_status = 'connected'
     
-    try:
-        conn = get_db_connection()
-        if conn:
-            conn.close()
-    except:
-        db_status = 'disconnected'
+    with get_db_connection() as conn:
+        if not conn or not db_pool.ping(conn):
+            db_status = 'disconnected'
     
     try:
         if cache:
@@ -78,54 +1105,11 @@ def health():
 @app.route('/users', methods=['GET', 'POST'])
 def users():
     if request.method == 'GET':
-        cached_users = None
-        if cache:
-            try:
-                cached_users = cache.get('users:all')
-                if cached_users:
-                    print("Usuários obtidos do cache")
-                    return jsonify({
-                        'source': 'cache',
-                        'users': json.loads(cached_users)
-                    })
-            except Exception as e:
-                print(f"Erro ao acessar cache: {e}")
-        
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        try:
-            cur = conn.cursor()
-            cur.execute('SELECT id, name, email, created_at FROM users ORDER BY id')
-            rows = cur.fetchall()
-            
-            users_list = [
-                {
-                    'id': row[0],
-                    'name': row[1],
-                    'email': row[2],
-                    'created_at': row[3].isoformat() if row[3] else None
-                }
-                for row in rows
-            ]
-            
-            if cache:
-                try:
-                    cache.setex('users:all', 60, json.dumps(users_list))
-                    print("Usuários armazenados no cache")
-                except Exception as e:
-                    print(f"Erro ao armazenar no cache: {e}")
-            
-            cur.close()
-            conn.close()
-            
-            return jsonify({
-                'source': 'database',
-                'users': users_list
-            })
-        except Exception as e:
-            return jsonify({'error': str(e)}), 500
+        if 'ids' in request.args:
+            return get_users_batch()
+        if 'after_id' in request.args or 'limit' in request.args:
+            return list_users_page()
+        return export_users()
     
     elif request.method == 'POST':
         data = request.get_json()
@@ -133,83 +1117,206 @@ def users():
         if not data or 'name' not in data or 'email' not in data:
             return jsonify({'error': 'Name and email are required'}), 400
         
-        conn = get_db_connection()
+        with get_db_connection() as conn:
+            if not conn:
+                return jsonify({'error': 'Database connection failed'}), 500
+            
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    'INSERT INTO users (name, email) VALUES (%s, %s) '
+                    'RETURNING id, name, email, created_at',
+                    (data['name'], data['email'])
+                )
+                user_data = row_to_user(cur.fetchone())
+                conn.commit()
+                cur.close()
+            except Exception as e:
+                return jsonify({'error': str(e)}), 500
+        
+        adjust_users_count(1)
+        if cache:
+            body = user_body(user_data)
+            write_cache_entry(f"user:{user_data['id']}", body, USER_CACHE_TTL, 0)
+            write_cache_entry(f"user:email:{user_data['email']}", body, USER_CACHE_TTL, 0)
+            append_user_to_cached_pages(user_data)
+        
+        return jsonify({
+            'message': 'User created successfully',
+            'id': user_data['id']
+        }), 201
+
+def iter_bulk_payload():
+    if request.mimetype == 'application/x-ndjson':
+        # Lê o corpo linha a linha, sem carregar a requisição inteira
+        index = 0
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                yield index, e
+            index += 1
+        return
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Body must be a JSON array or an NDJSON stream')
+    yield from enumerate(data)
+
+def validate_bulk_row(item):
+    if isinstance(item, Exception):
+        return f'Invalid JSON: {item}'
+    if not isinstance(item, dict):
+        return 'Row must be an object'
+    for field in ('name', 'email'):
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return f'{field} is required'
+        if len(value) > 100:
+            return f'{field} must have at most 100 characters'
+    return None
+
+def insert_bulk_batch(cur, batch, report):
+    inserted = psycopg2.extras.execute_values(
+        cur,
+        'INSERT INTO users (name, email) VALUES %s '
+        'ON CONFLICT (email) DO NOTHING RETURNING email',
+        [(row['name'], row['email']) for _, row in batch],
+        page_size=len(batch),
+        fetch=True
+    )
+    inserted_emails = {row[0] for row in inserted}
+    for index, row in batch:
+        if row['email'] not in inserted_emails:
+            report(index, 'Email already exists')
+    return len(inserted_emails)
+
+@app.route('/users/bulk', methods=['POST'])
+def users_bulk():
+    received = 0
+    inserted = 0
+    errors = []
+    error_count = 0
+    
+    def report(index, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < BULK_MAX_ERRORS:
+            errors.append({'index': index, 'error': message})
+    
+    with get_db_connection() as conn:
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
         try:
             cur = conn.cursor()
-            cur.execute(
-                'INSERT INTO users (name, email) VALUES (%s, %s) RETURNING id',
-                (data['name'], data['email'])
-            )
-            user_id = cur.fetchone()[0]
+            batch = []
+            batch_emails = set()
+            for index, item in iter_bulk_payload():
+                received += 1
+                error = validate_bulk_row(item)
+                if error:
+                    report(index, error)
+                    continue
+                if item['email'] in batch_emails:
+                    report(index, 'Duplicate email in request')
+                    continue
+                batch.append((index, item))
+                batch_emails.add(item['email'])
+                if len(batch) >= BULK_BATCH_SIZE:
+                    inserted += insert_bulk_batch(cur, batch, report)
+                    batch = []
+                    batch_emails = set()
+            if batch:
+                inserted += insert_bulk_batch(cur, batch, report)
             conn.commit()
             cur.close()
-            conn.close()
-            
-            if cache:
-                try:
-                    cache.delete('users:all')
-                    print("Cache invalidado")
-                except Exception as e:
-                    print(f"Erro ao invalidar cache: {e}")
-            
-            return jsonify({
-                'message': 'User created successfully',
-                'id': user_id
-            }), 201
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
+    
+    # Uma única invalidação para a carga inteira, e não uma por linha
+    if inserted:
+        adjust_users_count(inserted)
+        invalidate_user_pages()
+    
+    print(f"Carga em lote: {inserted} de {received} usuários inseridos")
+    return jsonify({
+        'message': 'Bulk load completed',
+        'received': received,
+        'inserted': inserted,
+        'failed': error_count,
+        'errors': sorted(errors, key=lambda error: error['index'])
+    }), 201 if inserted else 200
 
 @app.route('/users/<int:user_id>')
 def get_user(user_id):
-    cache_key = f'user:{user_id}'
-    if cache:
-        try:
-            cached_user = cache.get(cache_key)
-            if cached_user:
-                print(f"Usuário {user_id} obtido do cache")
-                return jsonify({
-                    'source': 'cache',
-                    'user': json.loads(cached_user)
-                })
-        except Exception as e:
-            print(f"Erro ao acessar cache: {e}")
+    try:
+        entry, source = cached_fetch(
+            f'user:{user_id}',
+            USER_CACHE_TTL,
+            lambda: load_user(user_id)
+        )
+    except DatabaseUnavailable:
+        return jsonify({'error': 'Database connection failed'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if not entry:
+        return jsonify({'error': 'User not found'}), 404
     
-    conn = get_db_connection()
-    if not conn:
+    print(f"Usuário {user_id} obtido de: {source}")
+    return cached_response(entry, source)
+
+@app.route('/users/by-email/<email>')
+def get_user_by_email(email):
+    try:
+        entry, source = cached_fetch(
+            f'user:email:{email}',
+            USER_CACHE_TTL,
+            lambda: load_user_by_email(email)
+        )
+    except DatabaseUnavailable:
         return jsonify({'error': 'Database connection failed'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    if not entry:
+        return jsonify({'error': 'User not found'}), 404
+    
+    print(f"Usuário {email} obtido de: {source}")
+    return cached_response(entry, source)
+
+@app.route('/users/search')
+def users_search():
+    prefix = request.args.get('q', '').strip().lower()
+    field = request.args.get('field', 'name')
+    
+    if not prefix:
+        return jsonify({'error': 'q is required'}), 400
+    if field not in USERS_SEARCH_FIELDS:
+        return jsonify({'error': f"field must be one of: {', '.join(USERS_SEARCH_FIELDS)}"}), 400
     
     try:
-        cur = conn.cursor()
-        cur.execute('SELECT id, name, email, created_at FROM users WHERE id = %s', (user_id,))
-        row = cur.fetchone()
-        
-        if not row:
-            return jsonify({'error': 'User not found'}), 404
-        
-        user_data = {
-            'id': row[0],
-            'name': row[1],
-            'email': row[2],
-            'created_at': row[3].isoformat() if row[3] else None
-        }
-        
-        if cache:
-            try:
-                cache.setex(cache_key, 300, json.dumps(user_data))
-                print(f"Usuário {user_id} armazenado no cache")
-            except Exception as e:
-                print(f"Erro ao armazenar no cache: {e}")
-        
-        cur.close()
-        conn.close()
-        
-        return jsonify({
-            'source': 'database',
-            'user': user_data
-        })
+        limit = int(request.args.get('limit', USERS_SEARCH_LIMIT))
+        after = None
+        if 'after' in request.args:
+            after_id, after_key = request.args['after'].split(':', 1)
+            after = (after_key, int(after_id))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer and after a next_after value'}), 400
+    
+    if not 1 <= limit <= USERS_PAGE_MAX:
+        return jsonify({'error': f'limit must be between 1 and {USERS_PAGE_MAX}'}), 400
+    
+    try:
+        return jsonify(search_users(field, prefix, after, limit))
+    except DatabaseUnavailable:
+        return jsonify({'error': 'Database connection failed'}), 500
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -239,9 +1346,10 @@ def cache_get(key):
         return jsonify({'error': 'Cache not available'}), 503
     
     try:
-        value = cache.get(key)
+        value = cache_raw.get(key)
         if value is None:
             return jsonify({'error': 'Key not found'}), 404
+        value = value.decode('utf-8', errors='replace')
         
         ttl = cache.ttl(key)
         return jsonify({
@@ -255,18 +1363,15 @@ def cache_get(key):
 @app.route('/stats')
 def stats():
     db_count = 0
+    count_source = 'unavailable'
     cache_keys = 0
     
-    conn = get_db_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute('SELECT COUNT(*) FROM users')
-            db_count = cur.fetchone()[0]
-            cur.close()
-            conn.close()
-        except:
-            pass
+    try:
+        db_count, count_source = users_count(
+            exact=request.args.get('exact', '').lower() in ('1', 'true')
+        )
+    except Exception as e:
+        print(f"Erro ao contar usuários: {e}")
     
     if cache:
         try:
@@ -276,14 +1381,51 @@ def stats():
     
     return jsonify({
         'database': {
-            'users_count': db_count
+            'users_count': db_count,
+            'users_count_source': count_source,
+            'pool': db_pool.stats()
         },
         'cache': {
-            'keys_count': cache_keys
+            'keys_count': cache_keys,
+            'l1': l1.stats() if l1 else {'enabled': False},
+            'l2': l2_stats()
         },
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/metrics')
+def prometheus_metrics():
+    lines = metrics.render()
+    
+    lines += [
+        '# HELP webapp_cache_lookups_total Consultas ao cache por camada e resultado.',
+        '# TYPE webapp_cache_lookups_total counter'
+    ]
+    if l1:
+        l1_stats = l1.stats()
+        lines.append(f'webapp_cache_lookups_total{{layer="l1",result="hit"}} {l1_stats["hits"]}')
+        lines.append(f'webapp_cache_lookups_total{{layer="l1",result="miss"}} {l1_stats["misses"]}')
+    counters = l2_stats()
+    for name, result in (('hits', 'hit'), ('stale_hits', 'stale_hit'),
+                         ('misses', 'miss'), ('errors', 'error')):
+        lines.append(f'webapp_cache_lookups_total{{layer="l2",result="{result}"}} {counters[name]}')
+    
+    pool = db_pool.stats()
+    lines += [
+        '# HELP webapp_db_pool_connections Conexões do pool por estado.',
+        '# TYPE webapp_db_pool_connections gauge',
+        f'webapp_db_pool_connections{{state="in_use"}} {pool["in_use"]}',
+        f'webapp_db_pool_connections{{state="idle"}} {pool["idle"]}',
+        '# HELP webapp_db_pool_checkout_timeouts_total Esperas por conexão que estouraram o tempo.',
+        '# TYPE webapp_db_pool_checkout_timeouts_total counter',
+        f'webapp_db_pool_checkout_timeouts_total {pool["timeouts"]}',
+        '# HELP webapp_db_pool_max_wait_seconds Maior espera por uma conexão do pool.',
+        '# TYPE webapp_db_pool_max_wait_seconds gauge',
+        f'webapp_db_pool_max_wait_seconds {pool["max_wait_ms"] / 1000:.6f}'
+    ]
+    
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     print("Iniciando aplicação web...")
     print(f"Banco de dados: {DB_CONFIG['host']}")
@@ -0,0 +1,419 @@
+"""Benchmark de carga da aplicação web do Desafio 3, sem Docker.
+
+Sobe o app.py em um subprocesso apontando para o Redis e o PostgreSQL
+configurados por variáveis de ambiente (REDIS_HOST, REDIS_PORT, DB_HOST,
+DB_PORT, DB_NAME, DB_USER, DB_PASSWORD), ou para substitutos locais
+(--fake-redis e --pgserver), popula a tabela e executa as cargas de
+trabalho com N clientes concorrentes usando conexões keep-alive.
+
+Exemplos:
+    python benchmark.py --fake-redis --pgserver /tmp/bench-pg
+    python benchmark.py --workload mixed --concurrency 32 --duration 30
+    python benchmark.py --url http://localhost:5000 --workload cache-hit
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import psycopg2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKLOADS = ('cache-hit', 'cache-miss', 'write-heavy', 'mixed')
+
+
+def start_fake_redis(port):
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        sys.exit("fakeredis não instalado: pip install -r requirements-bench.txt")
+
+    server = TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Redis substituto (fakeredis) em 127.0.0.1:{port}")
+    return {'REDIS_HOST': '127.0.0.1', 'REDIS_PORT': str(port)}
+
+
+def start_pgserver(datadir):
+    try:
+        import pgserver
+    except ImportError:
+        sys.exit("pgserver não instalado: pip install -r requirements-bench.txt")
+
+    server = pgserver.get_server(datadir)
+    conn = psycopg2.connect(server.get_uri())
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM pg_database WHERE datname = 'appdb'")
+    if not cur.fetchone():
+        cur.execute('CREATE DATABASE appdb')
+    conn.close()
+    print(f"PostgreSQL local (pgserver) em {datadir}")
+    # O pgserver escuta em um socket Unix dentro do diretório de dados
+    return server, {
+        'DB_HOST': datadir,
+        'DB_NAME': 'appdb',
+        'DB_USER': 'postgres',
+        'DB_PASSWORD': ''
+    }
+
+
+def db_config(env):
+    return {
+        'host': env.get('DB_HOST', 'localhost'),
+        'port': int(env.get('DB_PORT', 5432)),
+        'database': env.get('DB_NAME', 'appdb'),
+        'user': env.get('DB_USER', 'user'),
+        'password': env.get('DB_PASSWORD', 'password')
+    }
+
+
+def init_schema(env):
+    with open(os.path.join(BASE_DIR, 'init-db.sql')) as f:
+        script = f.read()
+    conn = psycopg2.connect(**db_config(env))
+    conn.autocommit = True
+    conn.cursor().execute(script)
+    conn.close()
+
+
+def start_app(env, port):
+    code = (
+        "from app import app; "
+        f"app.run(host='127.0.0.1', port={port}, threaded=True)"
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-c', code],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("A aplicação terminou durante a inicialização")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                conn.close()
+                print(f"Aplicação iniciada em http://127.0.0.1:{port}")
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    sys.exit("A aplicação não respondeu em /health a tempo")
+
+
+class Client:
+    """Conexão HTTP keep-alive de um worker de carga."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+
+
+def seed_users(client, count, run_id):
+    inserted = 0
+    for start in range(0, count, 1000):
+        batch = [
+            {'name': f'Bench {i}', 'email': f'bench-{run_id}-{i}@bench.local'}
+            for i in range(start, min(start + 1000, count))
+        ]
+        status, body = client.request('POST', '/users/bulk', batch)
+        if status >= 400:
+            sys.exit(f"Falha ao popular usuários: {status} {body[:200]}")
+        inserted += json.loads(body)['inserted']
+
+    # Coleta os ids pela própria API, página a página
+    ids = []
+    after_id = 0
+    while True:
+        status, body = client.request('GET', f'/users?after_id={after_id}&limit=1000')
+        page = json.loads(body)
+        ids += [user['id'] for user in page['users']]
+        if page['next_after_id'] is None:
+            return inserted, ids
+        after_id = page['next_after_id']
+
+
+class MissIds:
+    """Ids ainda não pedidos nesta execução, para a carga cache-miss.
+
+    Uma única instância é usada por todos os níveis de concorrência e cada id sai
+    no máximo uma vez, então nunca está no Redis nem no cache local do app.
+    Quando os ids acabam, take() retorna None.
+    """
+
+    def __init__(self, user_ids):
+        self.user_ids = user_ids
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            if self._next >= len(self.user_ids):
+                return None
+            user_id = self.user_ids[self._next]
+            self._next += 1
+            return user_id
+
+
+class Workload:
+    """Gera as requisições de uma carga de trabalho."""
+
+    def __init__(self, name, user_ids, run_id, miss_ids):
+        self.name = name
+        self.user_ids = user_ids
+        self.hot_ids = user_ids[:50]
+        self.run_id = run_id
+        self.miss_ids = miss_ids
+
+    def _new_user(self):
+        email = f'bench-{self.run_id}-{uuid.uuid4().hex}@bench.local'
+        return 'POST', '/users', {'name': 'Bench Writer', 'email': email}
+
+    def next_request(self, rng):
+        if self.name == 'cache-hit':
+            if rng.random() < 0.8:
+                return 'GET', f'/users/{rng.choice(self.hot_ids)}', None
+            return 'GET', '/users?limit=100', None
+
+        if self.name == 'cache-miss':
+            user_id = self.miss_ids.take()
+            # Sem ids inéditos, a carga termina em vez de repetir ids já em cache
+            return ('GET', f'/users/{user_id}', None) if user_id is not None else None
+
+        if self.name == 'write-heavy':
+            if rng.random() < 0.8:
+                return self._new_user()
+            return 'GET', f'/users/{rng.choice(self.user_ids)}', None
+
+        roll = rng.random()
+        if roll < 0.70:
+            # 80% dos acessos concentrados nos usuários mais populares
+            ids = self.hot_ids if rng.random() < 0.8 else self.user_ids
+            return 'GET', f'/users/{rng.choice(ids)}', None
+        if roll < 0.85:
+            after_id = rng.choice(self.user_ids[::100] or [0])
+            return 'GET', f'/users?after_id={after_id}&limit=100', None
+        if roll < 0.95:
+            ids = ','.join(str(user_id) for user_id in rng.sample(self.user_ids, min(20, len(self.user_ids))))
+            return 'GET', f'/users?ids={ids}', None
+        return self._new_user()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_workload(host, port, workload, concurrency, duration, warmup):
+    latencies = []
+    statuses = {}
+    sources = {}
+    errors = 0
+    lock = threading.Lock()
+    measuring = threading.Event()
+    stop = threading.Event()
+
+    def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        client = Client(host, port)
+        local_latencies = []
+        local_statuses = {}
+        local_sources = {}
+        local_errors = 0
+        while not stop.is_set():
+            request = workload.next_request(rng)
+            if request is None:
+                stop.set()
+                break
+            method, path, body = request
+            start = time.perf_counter()
+            try:
+                status, payload = client.request(method, path, body)
+            except Exception:
+                status, payload = None, b''
+            elapsed = time.perf_counter() - start
+            if not measuring.is_set():
+                continue
+            if status is None or status >= 500:
+                local_errors += 1
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+            local_latencies.append(elapsed)
+            if method == 'GET' and status == 200 and payload.startswith(b'{"source": "'):
+                source = payload[12:payload.index(b'"', 12)].decode()
+                local_sources[source] = local_sources.get(source, 0) + 1
+        client.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            for source, count in local_sources.items():
+                sources[source] = sources.get(source, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    stop.wait(warmup)
+    measuring.set()
+    start = time.perf_counter()
+    # Termina antes do prazo se a carga esgotar suas requisições
+    exhausted = stop.wait(duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'workload': workload.name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        'sources': sources,
+        'exhausted': exhausted
+    }
+
+
+def print_report(results):
+    print()
+    print(f"{'Carga':<12} {'Conc.':>5} {'Req.':>8} {'Req/s':>9} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'p99 ms':>8} {'Erros':>6}  Origem das respostas")
+    print("-" * 110)
+    for result in results:
+        sources = ', '.join(f'{name}={count}' for name, count in sorted(result['sources'].items()))
+        print(f"{result['workload']:<12} {result['concurrency']:>5} {result['requests']:>8} "
+              f"{result['throughput']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+              f"{result['p99_ms']:>8} {result['errors']:>6}  {sources}")
+
+    for result in results:
+        if result['workload'] != 'cache-miss':
+            continue
+        hits = sum(count for name, count in result['sources'].items() if name != 'database')
+        if hits:
+            print(f"\nAviso: {hits} respostas de cache-miss ({result['concurrency']} clientes) "
+                  f"vieram do cache; os números não medem só o banco")
+        if result['exhausted']:
+            print(f"\nAviso: cache-miss ({result['concurrency']} clientes) esgotou os ids inéditos "
+                  f"antes do fim; aumente --users para medir a duração inteira")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga do Desafio 3')
+    parser.add_argument('--url', help='Usa uma aplicação já em execução em vez de iniciar o app.py')
+    parser.add_argument('--workload', choices=WORKLOADS + ('all',), default='all')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16],
+                        help='Um ou mais níveis de concorrência (ex.: 1 8 32)')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos medidos por carga')
+    parser.add_argument('--warmup', type=float, default=2, help='Segundos de aquecimento por carga')
+    parser.add_argument('--users', type=int, default=50000,
+                        help='Usuários criados antes das cargas (cada um é pedido uma única vez em cache-miss)')
+    parser.add_argument('--port', type=int, default=5050, help='Porta do app.py iniciado pelo benchmark')
+    parser.add_argument('--fake-redis', action='store_true', help='Usa o fakeredis como Redis local')
+    parser.add_argument('--fake-redis-port', type=int, default=6390)
+    parser.add_argument('--pgserver', metavar='DIR', help='Sobe um PostgreSQL local (pgserver) em DIR')
+    parser.add_argument('--json', metavar='FILE', help='Grava os resultados em JSON (para comparar execuções)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    process = None
+    pg = None
+
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        env.setdefault('REDIS_HOST', 'localhost')
+        env.setdefault('DB_HOST', 'localhost')
+        if args.fake_redis:
+            env.update(start_fake_redis(args.fake_redis_port))
+        if args.pgserver:
+            pg, overrides = start_pgserver(args.pgserver)
+            env.update(overrides)
+        init_schema(env)
+        host, port = '127.0.0.1', args.port
+        process = start_app(env, port)
+
+    try:
+        run_id = uuid.uuid4().hex[:8]
+        client = Client(host, port)
+        inserted, user_ids = seed_users(client, args.users, run_id)
+        client.close()
+        print(f"{inserted} usuários criados ({len(user_ids)} na tabela)")
+
+        # Só os usuários criados agora (os ids mais altos) e fora dos populares do cache-hit
+        hot_ids = set(user_ids[:50])
+        miss_ids = MissIds([user_id for user_id in user_ids[len(user_ids) - inserted:] if user_id not in hot_ids])
+
+        names = WORKLOADS if args.workload == 'all' else (args.workload,)
+        results = []
+        for name in names:
+            for concurrency in args.concurrency:
+                print(f"Executando '{name}' com {concurrency} clientes...")
+                results.append(run_workload(
+                    host, port, Workload(name, user_ids, run_id, miss_ids),
+                    concurrency, args.duration, args.warmup
+                ))
+
+        print_report(results)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResultados gravados em {args.json}")
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+        if pg:
+            pg.cleanup()
+
+
+if __name__ == '__main__':
+    main()
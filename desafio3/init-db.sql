@@ -11,6 +11,11 @@ CREATE TABLE IF NOT EXISTS users (
 -- Cria índice no email para buscas rápidas
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 
+-- Índices para a busca por prefixo (/users/search): a collation "C" permite
+-- que LIKE 'prefixo%' use o índice e já entrega os resultados ordenados
+CREATE INDEX IF NOT EXISTS idx_users_name_prefix ON users ((lower(name) COLLATE "C"), id);
+CREATE INDEX IF NOT EXISTS idx_users_email_prefix ON users ((lower(email) COLLATE "C"), id);
+
 -- Insere alguns usuários de exemplo
 INSERT INTO users (name, email) VALUES
     ('João Silva', 'joao@email.com'),
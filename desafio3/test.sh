@@ -11,13 +11,13 @@ curl -s $BASE_URL/health | jq '.'
 echo ""
 
 # Teste 2: Listar usuários (do banco de dados)
-echo "2. Listando usuários (primeira vez - do banco)..."
-curl -s $BASE_URL/users | jq '.'
+echo "2. Listando primeira página de usuários (primeira vez - do banco)..."
+curl -s "$BASE_URL/users?limit=10" | jq '.'
 echo ""
 
 # Teste 3: Listar usuários novamente (do cache)
-echo "3. Listando usuários (segunda vez - do cache)..."
-curl -s $BASE_URL/users | jq '.'
+echo "3. Listando primeira página de usuários (segunda vez - do cache)..."
+curl -s "$BASE_URL/users?limit=10" | jq '.'
 echo ""
 
 # Teste 4: Criar novo usuário
@@ -27,9 +27,24 @@ curl -s -X POST $BASE_URL/users \
   -d '{"name": "Teste Docker", "email": "teste@docker.com"}' | jq '.'
 echo ""
 
+# Teste 4b: Criar usuários em lote
+echo "4b. Criando usuários em lote (NDJSON)..."
+printf '%s\n' \
+  '{"name": "Lote Um", "email": "lote1@docker.com"}' \
+  '{"name": "Lote Dois", "email": "lote2@docker.com"}' | \
+  curl -s -X POST $BASE_URL/users/bulk \
+    -H "Content-Type: application/x-ndjson" \
+    --data-binary @- | jq '.'
+echo ""
+
 # Teste 5: Listar usuários após criar novo (cache invalidado)
 echo "5. Listando usuários após criar novo..."
-curl -s $BASE_URL/users | jq '.'
+curl -s "$BASE_URL/users?limit=10" | jq '.'
+echo ""
+
+# Teste 5b: Exportação completa em streaming (NDJSON)
+echo "5b. Exportando todos os usuários em NDJSON..."
+curl -s "$BASE_URL/users?format=ndjson" | jq -c '.'
 echo ""
 
 # Teste 6: Testar cache manual
@@ -49,4 +64,9 @@ echo "7. Verificando estatísticas..."
 curl -s $BASE_URL/stats | jq '.'
 echo ""
 
+# Teste 8: Métricas Prometheus
+echo "8. Verificando métricas..."
+curl -s $BASE_URL/metrics | grep webapp_http_requests_total
+echo ""
+
 echo "✓ Todos os testes concluídos!"
@@ -1,9 +1,19 @@
-from flask import Flask, jsonify
-from datetime import datetime
+from flask import Flask, Response, jsonify, request
+from bisect import bisect_right, insort
+from datetime import date, datetime
+import hashlib
+import json
 import os
+import threading
 
 app = Flask(__name__)
 
+USERS_PAGE_MAX = int(os.getenv('USERS_PAGE_MAX', 1000))
+BODY_CACHE_MAX = int(os.getenv('BODY_CACHE_MAX', 1024))
+SERVER_MODE = os.getenv('SERVER_MODE', 'development')
+WEB_THREADS = int(os.getenv('WEB_THREADS', 8))
+WEB_KEEPALIVE = int(os.getenv('WEB_KEEPALIVE', 30))
+
 USERS_DB = [
     {
         'id': 1,
@@ -47,6 +57,212 @@ USERS_DB = [
     }
 ]
 
+def load_users():
+    # USERS_FILE aponta para um JSON com a lista de usuários; SYNTHETIC_USERS gera N extras
+    users = list(USERS_DB)
+    if os.getenv('USERS_FILE'):
+        with open(os.getenv('USERS_FILE')) as f:
+            users = json.load(f)
+    roles = ['Developer', 'Designer', 'Manager', 'Analyst']
+    next_id = max((u['id'] for u in users), default=0) + 1
+    for i in range(next_id, next_id + int(os.getenv('SYNTHETIC_USERS', 0))):
+        users.append({
+            'id': i,
+            'name': f'Usuário {i}',
+            'email': f'usuario{i}@email.com',
+            'role': roles[i % len(roles)],
+            'active': i % 5 != 0,
+            'joined_date': f'{2020 + i % 4}-{1 + i % 12:02d}-{1 + i % 28:02d}'
+        })
+    return users
+
+class UserStore:
+    """Usuários indexados por id e particionados por status, com os corpos JSON
+    de cada resposta serializados uma única vez e reaproveitados até os dados mudarem.
+
+    Os agregados do resumo (totais, cargos e soma das datas de entrada) são
+    atualizados a cada escrita, sem percorrer a base.
+    """
+    
+    def __init__(self, users):
+        self.lock = threading.Lock()
+        self.by_id = {}
+        # ids ordenados de cada partição (None = todos), para paginar por offset ou cursor
+        self.ids = {None: [], True: [], False: []}
+        self.roles = {}
+        # Soma de joined_date em dias (toordinal): a média de dias como membro sai dela em O(1)
+        self.joined_sum = 0
+        self.version = 0
+        self.bodies = {}
+        for user in users:
+            self._add(user, ordered=False)
+        for ids in self.ids.values():
+            ids.sort()
+    
+    def _add(self, user, ordered=True):
+        self.by_id[user['id']] = user
+        for ids in (self.ids[None], self.ids[user['active']]):
+            if ordered:
+                insort(ids, user['id'])
+            else:
+                ids.append(user['id'])
+        self.roles[user['role']] = self.roles.get(user['role'], 0) + 1
+        self.joined_sum += date.fromisoformat(user['joined_date']).toordinal()
+    
+    def _remove(self, user):
+        del self.by_id[user['id']]
+        for ids in (self.ids[None], self.ids[user['active']]):
+            del ids[bisect_right(ids, user['id']) - 1]
+        self.roles[user['role']] -= 1
+        if not self.roles[user['role']]:
+            del self.roles[user['role']]
+        self.joined_sum -= date.fromisoformat(user['joined_date']).toordinal()
+    
+    def _changed(self):
+        self.version += 1
+        self.bodies = {}
+    
+    def create(self, fields):
+        with self.lock:
+            user = dict(fields, id=max(self.by_id, default=0) + 1)
+            self._add(user)
+            self._changed()
+        return user
+    
+    def update(self, user_id, fields):
+        with self.lock:
+            current = self.by_id.get(user_id)
+            if current is None:
+                return None
+            # O registro é substituído, nunca alterado: leitores seguem com a versão antiga
+            user = dict(current, **fields)
+            self._remove(current)
+            self._add(user)
+            self._changed()
+        return user
+    
+    def page(self, active=None, offset=0, after_id=None, limit=None):
+        """Retorna (usuários, total da partição, há mais) a partir de offset ou depois de after_id."""
+        with self.lock:
+            ids = self.ids[active]
+            start = bisect_right(ids, after_id) if after_id is not None else offset
+            end = len(ids) if limit is None else start + limit
+            users = [self.by_id[user_id] for user_id in ids[start:end]]
+            return users, len(ids), end < len(ids)
+    
+    def summary(self):
+        with self.lock:
+            total = len(self.by_id)
+            average_days = date.today().toordinal() - self.joined_sum / total if total else 0
+            return {
+                'total_users': total,
+                'active_users': len(self.ids[True]),
+                'inactive_users': len(self.ids[False]),
+                'roles_distribution': dict(self.roles),
+                'average_days_as_member': average_days
+            }
+    
+    def encoded(self, key, build, version=None):
+        """Retorna (corpo, etag) da resposta identificada por key, serializando só na primeira vez.
+
+        version é a versão dos dados lidos antes da chamada, quando build usa uma leitura
+        feita fora dele; sem ela, vale a versão do momento em que build é chamado.
+        """
+        cached = self.bodies.get(key)
+        if cached is None:
+            if version is None:
+                version = self.version
+            body = app.json.dumps(build()).encode()
+            cached = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+            with self.lock:
+                # Não guarda um corpo montado com dados que mudaram no meio do caminho
+                if version == self.version:
+                    if len(self.bodies) >= BODY_CACHE_MAX:
+                        self.bodies.pop(next(iter(self.bodies)))
+                    self.bodies[key] = cached
+        return cached
+
+store = UserStore(load_users())
+
+def cached_response(key, build, version=None):
+    body, etag = store.encoded(key, build, version)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Devolve 304 sem corpo quando If-None-Match bate. Sem Last-Modified: um horário
+    # único e em segundos daria 304 falso para duas escritas no mesmo segundo ou para
+    # o resumo, que muda à meia-noite sem escrita
+    return response.make_conditional(request)
+
+def users_payload(users):
+    return {
+        'service': 'user-service',
+        'count': len(users),
+        'users': users
+    }
+
+def list_users(name, active):
+    """Lista (ou partição) com ?fields=, ?offset= ou ?after_id= e ?limit=, cada página com seu corpo em cache."""
+    fields = None
+    if request.args.get('fields'):
+        fields = tuple(dict.fromkeys(['id'] + request.args['fields'].split(',')))
+        unknown = [f for f in fields if f != 'id' and f not in USER_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    
+    try:
+        offset = int(request.args.get('offset', 0))
+        after_id = int(request.args['after_id']) if 'after_id' in request.args else None
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'offset, after_id and limit must be integers'}), 400
+    if offset < 0 or (limit is not None and not 1 <= limit <= USERS_PAGE_MAX):
+        return jsonify({'error': f'offset must be >= 0 and limit between 1 and {USERS_PAGE_MAX}'}), 400
+    if offset and after_id is not None:
+        return jsonify({'error': 'Use either offset or after_id'}), 400
+    
+    paginated = limit is not None or offset or after_id is not None
+    
+    def build():
+        users, total, has_more = store.page(active, offset, after_id, limit)
+        if fields:
+            users = [{f: user[f] for f in fields if f in user} for user in users]
+        payload = users_payload(users)
+        if paginated:
+            payload.update({
+                'total': total,
+                'offset': offset if after_id is None else None,
+                'after_id': after_id,
+                'limit': limit,
+                'next_after_id': users[-1]['id'] if has_more and users else None
+            })
+        return payload
+    
+    key = f"{name}:{','.join(fields or ())}:{offset}:{after_id}:{limit}"
+    return cached_response(key, build)
+
+USER_FIELDS = {'name': str, 'email': str, 'role': str, 'active': bool, 'joined_date': str}
+
+def validate_user_fields(data, partial):
+    if not isinstance(data, dict):
+        return None, 'JSON object expected'
+    missing = [] if partial else [f for f in ('name', 'email', 'role', 'joined_date') if f not in data]
+    if missing:
+        return None, f"Missing fields: {', '.join(missing)}"
+    fields = {}
+    for name, kind in USER_FIELDS.items():
+        if name in data:
+            if not isinstance(data[name], kind):
+                return None, f'{name} must be a {kind.__name__}'
+            fields[name] = data[name]
+    if 'joined_date' in fields:
+        try:
+            date.fromisoformat(fields['joined_date'])
+        except ValueError:
+            return None, 'joined_date must be YYYY-MM-DD'
+    if not partial:
+        fields.setdefault('active', True)
+    return fields, None
+
 @app.route('/')
 def home():
     return jsonify({
@@ -57,10 +273,14 @@ def home():
         'endpoints': {
             '/': 'Informações do serviço',
             '/health': 'Health check',
-            '/users': 'Lista todos os usuários',
+            '/users': 'Lista todos os usuários (?fields=, ?offset= ou ?after_id=, ?limit=)',
             '/users/<id>': 'Detalhes de um usuário específico',
+            '/users/batch?ids=': 'Vários usuários por id numa única chamada',
             '/users/active': 'Lista apenas usuários ativos',
-            '/users/inactive': 'Lista apenas usuários inativos'
+            '/users/inactive': 'Lista apenas usuários inativos',
+            '/users/summary': 'Totais, cargos e tempo médio como membro',
+            'POST /users': 'Cria um usuário',
+            'PATCH /users/<id>': 'Atualiza campos de um usuário'
         }
     })
 
@@ -73,17 +293,60 @@ def health():
         'uptime': 'running'
     })
 
-@app.route('/users')
+@app.route('/users', methods=['GET', 'POST'])
 def get_users():
-    return jsonify({
+    if request.method == 'POST':
+        fields, error = validate_user_fields(request.get_json(silent=True), partial=False)
+        if error:
+            return jsonify({'error': error}), 400
+        return jsonify({
+            'service': 'user-service',
+            'user': store.create(fields)
+        }), 201
+    
+    return list_users('users', None)
+
+@app.route('/users/summary')
+def get_users_summary():
+    # A média depende do dia corrente, então o corpo em cache é por data
+    return cached_response(f'summary:{date.today()}', lambda: {
         'service': 'user-service',
-        'count': len(USERS_DB),
-        'users': USERS_DB
+        'summary': store.summary()
     })
 
-@app.route('/users/<int:user_id>')
+@app.route('/users/batch')
+def get_users_batch():
+    """Vários usuários numa chamada só: ?ids=1,2,3 (até USERS_PAGE_MAX), em ordem de id."""
+    try:
+        ids = sorted({int(i) for i in request.args.get('ids', '').split(',') if i.strip()})
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+    if not 1 <= len(ids) <= USERS_PAGE_MAX:
+        return jsonify({'error': f'ids must have between 1 and {USERS_PAGE_MAX} entries'}), 400
+    
+    def build():
+        users = [store.by_id[i] for i in ids if i in store.by_id]
+        payload = users_payload(users)
+        payload['missing'] = [i for i in ids if i not in store.by_id]
+        return payload
+    
+    # Chave normalizada: a mesma lista em outra ordem ou com repetições usa o mesmo corpo
+    return cached_response(f"batch:{','.join(map(str, ids))}", build)
+
+@app.route('/users/<int:user_id>', methods=['GET', 'PATCH'])
 def get_user(user_id):
-    user = next((u for u in USERS_DB if u['id'] == user_id), None)
+    if request.method == 'PATCH':
+        fields, error = validate_user_fields(request.get_json(silent=True), partial=True)
+        if error:
+            return jsonify({'error': error}), 400
+        user = store.update(user_id, fields)
+        if not user:
+            return jsonify({'error': 'User not found', 'user_id': user_id}), 404
+        return jsonify({'service': 'user-service', 'user': user})
+    
+    # Versão lida antes do registro: um PATCH no meio impede que o corpo antigo fique em cache
+    version = store.version
+    user = store.by_id.get(user_id)
     
     if not user:
         return jsonify({
@@ -91,30 +354,45 @@ def get_user(user_id):
             'user_id': user_id
         }), 404
     
-    return jsonify({
+    return cached_response(f'user:{user_id}', lambda: {
         'service': 'user-service',
         'user': user
-    })
+    }, version)
 
 @app.route('/users/active')
 def get_active_users():
-    active_users = [u for u in USERS_DB if u['active']]
-    return jsonify({
-        'service': 'user-service',
-        'count': len(active_users),
-        'users': active_users
-    })
+    return list_users('users:active', True)
 
 @app.route('/users/inactive')
 def get_inactive_users():
-    inactive_users = [u for u in USERS_DB if not u['active']]
-    return jsonify({
-        'service': 'user-service',
-        'count': len(inactive_users),
-        'users': inactive_users
-    })
+    return list_users('users:inactive', False)
+
+def run_production(port):
+    from gunicorn.app.base import BaseApplication
+    
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'0.0.0.0:{port}')
+            # Um único processo: os usuários ficam em memória e as escritas precisam
+            # ser vistas por todas as requisições
+            self.cfg.set('workers', 1)
+            # gthread mantém as conexões keep-alive do Service B abertas; o servidor de
+            # desenvolvimento do Flask fecha a conexão a cada resposta
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('threads', WEB_THREADS)
+            self.cfg.set('keepalive', WEB_KEEPALIVE)
+            self.cfg.set('accesslog', '-')
+        
+        def load(self):
+            return app
+    
+    print(f"Microsserviço A (Users) iniciando na porta {port} (gunicorn, {WEB_THREADS} threads)...")
+    Server().run()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
-    print(f"Microsserviço A (Users) iniciando na porta {port}...")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    if SERVER_MODE == 'production':
+        run_production(port)
+    else:
+        print(f"Microsserviço A (Users) iniciando na porta {port}...")
+        app.run(host='0.0.0.0', port=port, debug=True)
@@ -1,11 +1,352 @@
 from flask import Flask, jsonify, request as flask_request
 import requests
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
 import os
+import threading
+import time
 
 app = Flask(__name__)
 
 USER_SERVICE_URL = os.getenv('USER_SERVICE_URL', 'http://localhost:5001')
+USER_SERVICE_POOL_SIZE = int(os.getenv('USER_SERVICE_POOL_SIZE', 10))
+USER_SERVICE_CONNECT_TIMEOUT = float(os.getenv('USER_SERVICE_CONNECT_TIMEOUT', 2))
+USER_SERVICE_READ_TIMEOUT = float(os.getenv('USER_SERVICE_READ_TIMEOUT', 10))
+USER_SERVICE_RETRIES = int(os.getenv('USER_SERVICE_RETRIES', 2))
+USER_SERVICE_BACKOFF = float(os.getenv('USER_SERVICE_BACKOFF', 0.2))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))
+USER_CACHE_MAX_STALE = float(os.getenv('USER_CACHE_MAX_STALE', 300))
+USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+CIRCUIT_WINDOW = int(os.getenv('CIRCUIT_WINDOW', 20))
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 10))
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 2))
+CIRCUIT_SLOW_RATE = float(os.getenv('CIRCUIT_SLOW_RATE', 0.5))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 10))
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', 5))
+USER_INFO_BATCH_MAX = int(os.getenv('USER_INFO_BATCH_MAX', 1000))
+# Buscas paralelas quando o Service A não tem /users/batch; acima do pool, só esperariam conexão
+USER_INFO_CONCURRENCY = int(os.getenv('USER_INFO_CONCURRENCY', USER_SERVICE_POOL_SIZE))
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Chamada recusada sem ir ao Service A porque o circuito está aberto."""
+
+class CircuitBreaker:
+    """Circuit breaker pelas últimas CIRCUIT_WINDOW chamadas ao Service A.
+
+    Com pelo menos CIRCUIT_MIN_CALLS chamadas na janela, o circuito abre se a fração
+    de falhas (exceção ou 5xx) ou de chamadas lentas passar do limite. Aberto, recusa
+    tudo na hora por CIRCUIT_OPEN_SECONDS; depois deixa passar uma única chamada de
+    teste (half-open), que fecha o circuito se for rápida e bem-sucedida ou o reabre.
+    """
+    
+    def __init__(self, window, min_calls, failure_rate, slow_call_seconds, slow_rate, open_seconds):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.open_seconds = open_seconds
+        self.lock = threading.Lock()
+        self.calls = deque(maxlen=window)
+        self.state = 'closed'
+        self.opened_at = 0
+        self.probing = False
+        self.counters = {'opened': 0, 'rejected': 0}
+    
+    def before(self):
+        """Libera a chamada (retorna True se ela é o teste do half-open) ou levanta CircuitOpenError."""
+        with self.lock:
+            if self.state == 'closed':
+                return False
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = 'half-open'
+            if self.state == 'half-open' and not self.probing:
+                self.probing = True
+                return True
+            self.counters['rejected'] += 1
+            retry_in = max(0, self.opened_at + self.open_seconds - time.monotonic())
+        raise CircuitOpenError(f'Circuit open for user-service, retry in {retry_in:.1f}s')
+    
+    def after(self, probe, ok, elapsed):
+        slow = elapsed >= self.slow_call_seconds
+        with self.lock:
+            if probe:
+                self.probing = False
+                if ok and not slow:
+                    self.state = 'closed'
+                    self.calls.clear()
+                else:
+                    self._open()
+                return
+            if self.state != 'closed':
+                return
+            self.calls.append((ok, slow))
+            if len(self.calls) >= self.min_calls:
+                failures = sum(1 for call_ok, _ in self.calls if not call_ok) / len(self.calls)
+                slow_calls = sum(1 for _, call_slow in self.calls if call_slow) / len(self.calls)
+                if failures >= self.failure_rate or slow_calls >= self.slow_rate:
+                    self._open()
+    
+    def _open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+        self.calls.clear()
+        self.counters['opened'] += 1
+    
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, state=self.state, window_calls=len(self.calls))
+
+class ConnectCounter:
+    """Conta as conexões TCP realmente abertas com o Service A.
+
+    O urllib3 reabre no lugar um objeto de conexão cujo socket o servidor fechou, então
+    o num_connections do pool não mostra reconexões; o connect() é chamado em todas.
+    """
+    
+    lock = threading.Lock()
+    connects = 0
+    
+    def connect(self):
+        super().connect()
+        with ConnectCounter.lock:
+            ConnectCounter.connects += 1
+
+class CountingHTTPConnection(ConnectCounter, HTTPConnection):
+    pass
+
+class CountingHTTPSConnection(ConnectCounter, HTTPSConnection):
+    pass
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+class UserServiceClient:
+    """Cliente HTTP do Service A com um pool de conexões keep-alive compartilhado.
+
+    Cada thread usa sua própria Session (que não é thread-safe), mas todas montam o
+    mesmo HTTPAdapter, e é ele que guarda o pool de conexões reaproveitadas.
+    """
+    
+    def __init__(self, base_url, breaker):
+        self.base_url = base_url
+        self.breaker = breaker
+        # Só GET/HEAD são repetidos: falhas de conexão, leitura e 502/503/504
+        retry = Retry(
+            total=USER_SERVICE_RETRIES,
+            backoff_factor=USER_SERVICE_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD'}),
+            raise_on_status=False
+        )
+        # pool_block: com todas as conexões em uso, espera uma voltar ao pool em vez
+        # de abrir conexões extras que seriam descartadas depois
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=USER_SERVICE_POOL_SIZE,
+            pool_block=True,
+            max_retries=retry
+        )
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+        self.local = threading.local()
+    
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self.local.session = session
+        return session
+    
+    def get(self, path, guarded=True, **kwargs):
+        """GET no Service A; com guarded, passa pelo circuit breaker."""
+        kwargs.setdefault('timeout', (USER_SERVICE_CONNECT_TIMEOUT, USER_SERVICE_READ_TIMEOUT))
+        if not guarded:
+            return self.session().get(f'{self.base_url}{path}', **kwargs)
+        
+        probe = self.breaker.before()
+        start = time.monotonic()
+        try:
+            response = self.session().get(f'{self.base_url}{path}', **kwargs)
+        except requests.exceptions.RequestException:
+            self.breaker.after(probe, False, time.monotonic() - start)
+            raise
+        self.breaker.after(probe, response.status_code < 500, time.monotonic() - start)
+        return response
+    
+    def stats(self):
+        pools = self.adapter.poolmanager.pools
+        sent = 0
+        for key in pools.keys():
+            sent += pools[key].num_requests
+        with ConnectCounter.lock:
+            connects = ConnectCounter.connects
+        return {
+            'pool_size': USER_SERVICE_POOL_SIZE,
+            'tcp_connections': connects,
+            'requests': sent,
+            'requests_per_connection': round(sent / connects, 1) if connects else None
+        }
+
+breaker = CircuitBreaker(
+    CIRCUIT_WINDOW, CIRCUIT_MIN_CALLS, CIRCUIT_FAILURE_RATE,
+    CIRCUIT_SLOW_CALL_SECONDS, CIRCUIT_SLOW_RATE, CIRCUIT_OPEN_SECONDS
+)
+user_service = UserServiceClient(USER_SERVICE_URL, breaker)
+
+class CachedResponse:
+    """Resposta 200 do Service A guardada com seus validadores (ETag / Last-Modified)."""
+    
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.data = response.json()
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+        self.fetched_at = time.monotonic()
+        # Resultados calculados a partir destes dados (ex.: a lista enriquecida)
+        self.derived = {}
+    
+    def json(self):
+        return self.data
+
+class UserServiceCache:
+    """Cache local das respostas do Service A, por caminho.
+
+    Dentro do TTL a resposta é servida direto da memória. Depois dele, e até
+    USER_CACHE_MAX_STALE segundos, a cópia antiga ainda é servida enquanto uma thread
+    em segundo plano revalida com If-None-Match / If-Modified-Since (um 304 só renova
+    o prazo). Sem cópia utilizável, uma única requisição por caminho vai ao Service A;
+    se ela falhar e houver uma cópia antiga, mesmo vencida, essa cópia é servida.
+    """
+    
+    def __init__(self, client, ttl, max_stale, max_entries):
+        self.client = client
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.fetch_locks = {}
+        self.refreshing = set()
+        self.counters = {'fresh': 0, 'stale': 0, 'miss': 0, 'revalidated': 0, 'refreshed': 0, 'fallback': 0}
+    
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+    
+    def _lookup(self, path):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry:
+                self.entries.move_to_end(path)
+            return entry
+    
+    def _store(self, path, entry):
+        with self.lock:
+            self.entries[path] = entry
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def _fetch(self, path, entry):
+        headers = {}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        
+        response = self.client.get(path, headers=headers)
+        if response.status_code == 304 and entry:
+            entry.fetched_at = time.monotonic()
+            self.count('revalidated')
+            return entry
+        if response.status_code != 200:
+            # Erros (404, 5xx) não são guardados: o chamador trata a resposta como antes
+            return response
+        
+        entry = CachedResponse(response)
+        self._store(path, entry)
+        return entry
+    
+    def _refresh(self, path, entry):
+        try:
+            # Só conta quando a cópia foi de fato renovada (200 ou 304), não em erros do Service A
+            if isinstance(self._fetch(path, entry), CachedResponse):
+                self.count('refreshed')
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao revalidar {path} no cache: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(path)
+    
+    def get(self, path):
+        """Retorna (resposta, origem), com origem em fresh, stale, revalidated, miss ou fallback."""
+        entry = self._lookup(path)
+        if entry:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.ttl:
+                self.count('fresh')
+                return entry, 'fresh'
+            if age < self.ttl + self.max_stale:
+                with self.lock:
+                    start = path not in self.refreshing
+                    self.refreshing.add(path)
+                if start:
+                    threading.Thread(target=self._refresh, args=(path, entry), daemon=True).start()
+                self.count('stale')
+                return entry, 'stale'
+        
+        # Um lock por caminho, mantido enquanto houver thread esperando por ele: quem chega
+        # depois usa o mesmo lock e não dispara uma segunda busca em paralelo
+        with self.lock:
+            slot = self.fetch_locks.setdefault(path, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                # Outra thread pode ter buscado enquanto esta esperava
+                current = self._lookup(path)
+                if current and time.monotonic() - current.fetched_at < self.ttl:
+                    self.count('fresh')
+                    return current, 'fresh'
+                try:
+                    response = self._fetch(path, entry)
+                except requests.exceptions.RequestException:
+                    if entry is None:
+                        raise
+                    response = None
+        finally:
+            with self.lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self.fetch_locks[path]
+        
+        if response is entry:
+            return response, 'revalidated'
+        if response is None or (entry and response.status_code >= 500):
+            # Service A fora, lento ou com o circuito aberto: serve a última resposta boa
+            self.count('fallback')
+            return entry, 'fallback'
+        self.count('miss')
+        return response, 'miss'
+    
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries), ttl=self.ttl, max_stale=self.max_stale)
+
+user_cache = UserServiceCache(user_service, USER_CACHE_TTL, USER_CACHE_MAX_STALE, USER_CACHE_MAX_ENTRIES)
 
 @app.route('/')
 def home():
@@ -20,55 +361,251 @@ def home():
         'endpoints': {
             '/': 'Informações do serviço',
             '/health': 'Health check',
-            '/user-info': 'Informações enriquecidas de todos os usuários',
+            '/user-info': 'Informações enriquecidas dos usuários (?fields=, ?offset= ou ?after_id=, ?limit=)',
+            '/user-info?ids=': 'Informações enriquecidas de vários usuários por id',
             '/user-info/<id>': 'Informações enriquecidas de um usuário',
-            '/user-summary': 'Resumo estatístico dos usuários'
+            '/user-summary': 'Resumo estatístico dos usuários',
+            '/stats': 'Contadores do pool de conexões, uso do cache e estado do circuito do Service A'
         }
     })
 
+class HealthChecker:
+    """Verifica o /health do Service A em segundo plano, a cada HEALTH_CHECK_INTERVAL
+    segundos, para o /health do Service B responder sem esperar pelo Service A.
+
+    A verificação não passa pelo circuit breaker: continua mesmo com o circuito aberto.
+    """
+    
+    def __init__(self, client, interval):
+        self.client = client
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.status = 'unknown'
+        self.checked_at = None
+        self.latency_ms = None
+    
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+    
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+    
+    def check(self):
+        start = time.monotonic()
+        try:
+            response = self.client.get('/health', guarded=False, timeout=(USER_SERVICE_CONNECT_TIMEOUT, self.interval))
+            status = 'connected' if response.status_code == 200 else 'error'
+        except requests.exceptions.RequestException:
+            status = 'unreachable'
+        self.status = status
+        self.latency_ms = round((time.monotonic() - start) * 1000, 1)
+        self.checked_at = datetime.now().isoformat()
+
+health_checker = HealthChecker(user_service, HEALTH_CHECK_INTERVAL)
+
 @app.route('/health')
 def health():
-    user_service_status = 'unknown'
-    try:
-        response = requests.get(f'{USER_SERVICE_URL}/health', timeout=5)
-        if response.status_code == 200:
-            user_service_status = 'connected'
-        else:
-            user_service_status = 'error'
-    except requests.exceptions.RequestException:
-        user_service_status = 'unreachable'
-    
+    health_checker.start()
     return jsonify({
         'status': 'healthy',
         'service': 'user-info-service',
         'timestamp': datetime.now().isoformat(),
         'dependencies': {
-            'user-service': user_service_status
+            'user-service': health_checker.status
+        },
+        'user_service_check': {
+            'checked_at': health_checker.checked_at,
+            'latency_ms': health_checker.latency_ms,
+            'circuit': breaker.stats()['state']
         }
     })
 
+class Enricher:
+    """Memoiza o enriquecimento dos usuários para o dia corrente.
+
+    Os campos derivados só dependem do registro e da data de hoje, então ficam
+    guardados por (id, versão do registro) e os cálculos de tempo de casa por
+    joined_date. Tudo é descartado quando o dia muda.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.day = None
+        self.users = {}
+        self.memberships = {}
+    
+    def _today(self):
+        today = date.today()
+        if today != self.day:
+            with self.lock:
+                if today != self.day:
+                    self.users = {}
+                    self.memberships = {}
+                    self.day = today
+        return today
+    
+    def _membership(self, joined_date, today):
+        membership = self.memberships.get(joined_date)
+        if membership is None:
+            days_active = (today - date.fromisoformat(joined_date)).days
+            membership = (days_active, days_active // 365, (days_active % 365) // 30)
+            self.memberships[joined_date] = membership
+        return membership
+    
+    def _info(self, user, today):
+        # Sem versão explícita, os campos usados no enriquecimento identificam a versão
+        version = user.get('version') or (user['name'], user['role'], user['active'], user['joined_date'])
+        key = (user['id'], version)
+        info = self.users.get(key)
+        if info is None:
+            days_active, years, months = self._membership(user['joined_date'], today)
+            info = {
+                'days_since_joined': days_active,
+                'years_active': years,
+                'months_active': months,
+                'status_text': 'Ativo' if user['active'] else 'Inativo',
+                'profile_summary': f"{user['name']} - {user['role']} {'(Ativo)' if user['active'] else '(Inativo)'}",
+                'member_since': f"{user['name']} é membro desde {user['joined_date']} ({years} anos, {months} meses)"
+            }
+            self.users[key] = info
+        return info
+    
+    def enrich(self, user):
+        enriched = user.copy()
+        enriched['enriched_info'] = self._info(user, self._today())
+        return enriched
+    
+    def enrich_all(self, users, memo=None):
+        """Enriquece uma lista inteira; com memo, reaproveita o resultado até os dados ou o dia mudarem."""
+        today = self._today()
+        if memo is not None and memo.get('day') == today:
+            return memo['users']
+        
+        # Uma passada pelas datas distintas antes de montar os registros
+        for joined_date in {user['joined_date'] for user in users}:
+            self._membership(joined_date, today)
+        enriched = [dict(user, enriched_info=self._info(user, today)) for user in users]
+        
+        if memo is not None:
+            memo['users'] = enriched
+            memo['day'] = today
+        return enriched
+
+enricher = Enricher()
+
 def enrich_user_data(user):
-    joined_date = datetime.strptime(user['joined_date'], '%Y-%m-%d')
-    days_active = (datetime.now() - joined_date).days
-    years = days_active // 365
-    months = (days_active % 365) // 30
-    
-    enriched = user.copy()
-    enriched['enriched_info'] = {
-        'days_since_joined': days_active,
-        'years_active': years,
-        'months_active': months,
-        'status_text': 'Ativo' if user['active'] else 'Inativo',
-        'profile_summary': f"{user['name']} - {user['role']} {'(Ativo)' if user['active'] else '(Inativo)'}",
-        'member_since': f"{user['name']} é membro desde {user['joined_date']} ({years} anos, {months} meses)"
+    return enricher.enrich(user)
+
+# Campos que o enriquecimento lê; sempre pedidos ao Service A junto com os de ?fields=
+ENRICH_FIELDS = ['id', 'name', 'role', 'active', 'joined_date']
+
+def users_path():
+    """Monta a chamada a /users do Service A repassando paginação e só os campos necessários."""
+    params = {
+        name: flask_request.args[name]
+        for name in ('offset', 'after_id', 'limit') if name in flask_request.args
     }
+    if flask_request.args.get('fields'):
+        wanted = flask_request.args['fields'].split(',')
+        params['fields'] = ','.join(dict.fromkeys(ENRICH_FIELDS + wanted))
+    return f'/users?{urlencode(params)}' if params else '/users'
+
+class UpstreamError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f'user-service returned {status_code}')
+        self.status_code = status_code
+
+class BatchFetcher:
+    """Busca vários usuários no Service A com uma chamada a /users/batch.
+
+    Se o Service A não tiver a rota (404/405), busca cada /users/<id> em paralelo,
+    com no máximo USER_INFO_CONCURRENCY chamadas simultâneas, e só volta a tentar
+    a rota em lote depois de USER_CACHE_TTL segundos.
+    """
+    
+    def __init__(self, cache, concurrency):
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='user-fetch')
+        self.batch_retry_at = 0
+    
+    def fetch(self, ids):
+        """Retorna (usuários, ids ausentes, origem do cache, memo ou None, modo)."""
+        if time.monotonic() >= self.batch_retry_at:
+            response, cache_status = self.cache.get(f"/users/batch?ids={','.join(map(str, ids))}")
+            if response.status_code == 200:
+                data = response.json()
+                return data['users'], data['missing'], cache_status, response.derived.setdefault('user-info', {}), 'batch'
+            if response.status_code not in (404, 405):
+                raise UpstreamError(response.status_code)
+            self.batch_retry_at = time.monotonic() + self.cache.ttl
+        
+        users, missing, statuses = [], [], set()
+        for user_id, (response, cache_status) in zip(ids, self.executor.map(self._fetch_one, ids)):
+            statuses.add(cache_status)
+            if response.status_code == 404:
+                missing.append(user_id)
+            elif response.status_code != 200:
+                raise UpstreamError(response.status_code)
+            else:
+                users.append(response.json()['user'])
+        cache_status = statuses.pop() if len(statuses) == 1 else 'mixed'
+        return users, missing, cache_status, None, 'parallel'
     
-    return enriched
+    def _fetch_one(self, user_id):
+        return self.cache.get(f'/users/{user_id}')
+
+batch_fetcher = BatchFetcher(user_cache, USER_INFO_CONCURRENCY)
+
+def get_user_info_batch(raw_ids):
+    try:
+        ids = sorted({int(i) for i in raw_ids.split(',') if i.strip()})
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+    if not 1 <= len(ids) <= USER_INFO_BATCH_MAX:
+        return jsonify({'error': f'ids must have between 1 and {USER_INFO_BATCH_MAX} entries'}), 400
+    
+    try:
+        users, missing, cache_status, memo, mode = batch_fetcher.fetch(ids)
+    except UpstreamError as e:
+        return jsonify({
+            'error': 'Failed to fetch users from user-service',
+            'status_code': e.status_code
+        }), 502
+    except requests.exceptions.RequestException as e:
+        return jsonify({
+            'error': 'Failed to communicate with user-service',
+            'details': str(e)
+        }), 503
+    
+    enriched_users = enricher.enrich_all(users, memo)
+    
+    return jsonify({
+        'service': 'user-info-service',
+        'source': 'user-service',
+        'cache': cache_status,
+        'upstream': mode,
+        'count': len(enriched_users),
+        'users': enriched_users,
+        'missing': missing,
+        'processed_at': datetime.now().isoformat()
+    })
 
 @app.route('/user-info')
 def get_all_user_info():
+    if 'ids' in flask_request.args:
+        return get_user_info_batch(flask_request.args['ids'])
+    
     try:
-        response = requests.get(f'{USER_SERVICE_URL}/users', timeout=10)
+        response, cache_status = user_cache.get(users_path())
+        
+        if response.status_code == 400:
+            return jsonify(response.json()), 400
         
         if response.status_code != 200:
             return jsonify({
@@ -79,15 +616,22 @@ def get_all_user_info():
         data = response.json()
         users = data.get('users', [])
         
-        enriched_users = [enrich_user_data(user) for user in users]
+        enriched_users = enricher.enrich_all(users, response.derived.setdefault('user-info', {}))
         
-        return jsonify({
+        payload = {
             'service': 'user-info-service',
             'source': 'user-service',
+            'cache': cache_status,
             'count': len(enriched_users),
             'users': enriched_users,
             'processed_at': datetime.now().isoformat()
-        })
+        }
+        if 'total' in data:
+            payload.update({
+                'total': data['total'],
+                'next_after_id': data['next_after_id']
+            })
+        return jsonify(payload)
         
     except requests.exceptions.RequestException as e:
         return jsonify({
@@ -98,7 +642,7 @@ def get_all_user_info():
 @app.route('/user-info/<int:user_id>')
 def get_user_info(user_id):
     try:
-        response = requests.get(f'{USER_SERVICE_URL}/users/{user_id}', timeout=10)
+        response, cache_status = user_cache.get(f'/users/{user_id}')
         
         if response.status_code == 404:
             return jsonify({
@@ -120,6 +664,7 @@ def get_user_info(user_id):
         return jsonify({
             'service': 'user-info-service',
             'source': 'user-service',
+            'cache': cache_status,
             'user': enriched_user,
             'processed_at': datetime.now().isoformat()
         })
@@ -133,43 +678,30 @@ def get_user_info(user_id):
 @app.route('/user-summary')
 def get_user_summary():
     try:
-        response = requests.get(f'{USER_SERVICE_URL}/users', timeout=10)
+        # O Service A mantém os agregados; não é preciso baixar e percorrer a lista inteira
+        response, cache_status = user_cache.get('/users/summary')
         
         if response.status_code != 200:
             return jsonify({
-                'error': 'Failed to fetch users from user-service',
+                'error': 'Failed to fetch summary from user-service',
                 'status_code': response.status_code
             }), 502
         
-        data = response.json()
-        users = data.get('users', [])
-        
-        total_users = len(users)
-        active_users = sum(1 for u in users if u['active'])
-        inactive_users = total_users - active_users
-        
-        roles = {}
-        for user in users:
-            role = user['role']
-            roles[role] = roles.get(role, 0) + 1
-        
-        total_days = 0
-        for user in users:
-            joined_date = datetime.strptime(user['joined_date'], '%Y-%m-%d')
-            days = (datetime.now() - joined_date).days
-            total_days += days
-        
-        avg_days = total_days / total_users if total_users > 0 else 0
+        summary = response.json()['summary']
+        total_users = summary['total_users']
+        active_users = summary['active_users']
+        avg_days = summary['average_days_as_member']
         
         return jsonify({
             'service': 'user-info-service',
             'source': 'user-service',
+            'cache': cache_status,
             'summary': {
                 'total_users': total_users,
                 'active_users': active_users,
-                'inactive_users': inactive_users,
+                'inactive_users': summary['inactive_users'],
                 'active_percentage': round((active_users / total_users * 100), 2) if total_users > 0 else 0,
-                'roles_distribution': roles,
+                'roles_distribution': summary['roles_distribution'],
                 'average_days_as_member': round(avg_days, 0),
                 'average_years_as_member': round(avg_days / 365, 1)
             },
@@ -182,8 +714,19 @@ def get_user_summary():
             'details': str(e)
         }), 503
 
+@app.route('/stats')
+def stats():
+    return jsonify({
+        'service': 'user-info-service',
+        'user_service_pool': user_service.stats(),
+        'user_service_cache': user_cache.stats(),
+        'user_service_circuit': breaker.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5002))
     print(f"Microsserviço B (User Info) iniciando na porta {port}...")
     print(f"Conectando ao User Service em: {USER_SERVICE_URL}")
+    health_checker.start()
     app.run(host='0.0.0.0', port=port, debug=True)